@@ -0,0 +1,4 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Benchmark suite of the model kernels and solver paths (see run.py).
+"""
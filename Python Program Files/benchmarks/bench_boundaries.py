@@ -0,0 +1,80 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Benchmarks of the stability region boundaries of
+% Section_2/Host_Refuge_Stability_Region.py and
+% Section_4/Host_Mortality_Stability_Region.py: the scripts' fsolve loop
+% over R, the batched Newton solve and the pseudo-arclength continuation,
+% over the grid resolution.
+"""
+
+# Import libraries:
+import numpy as np
+from scipy.optimize import fsolve
+
+from host_parasitoid.boundaries import solve_boundary
+from host_parasitoid.continuation import trace_boundary
+
+BOUNDARIES = ['alpha_star', 'z_star']
+
+
+def _alpha_loop(R_vec):
+    a_star = np.zeros_like(R_vec)
+    for i in range(len(R_vec)):
+        R = R_vec[i]
+
+        def f(a):
+            return (1 - a*R) * R / (R - 1) * np.log(((1 - a) * R)
+                                                    / (1 - a * R)) - 1.0
+
+        a_star[i] = fsolve(f, 0.9 / R, xtol=1e-6, maxfev=int(1e6))[0]
+    return a_star
+
+
+def _z_loop(R_vec):
+    z_star = np.zeros_like(R_vec)
+    for i in range(len(R_vec)):
+        R = R_vec[i]
+
+        def f(z):
+            return R * (np.log(R) - z) / (R - np.exp(z)) - z - 1.0
+
+        z_star[i] = fsolve(f, 0.5 * np.log(R), xtol=1e-6,
+                           maxfev=int(1e6))[0]
+    return z_star
+
+
+class FsolveLoop:
+    """The scripts' loop of scalar fsolve calls."""
+    params = [BOUNDARIES, [100, 10000]]
+    param_names = ['boundary', 'n']
+
+    def setup(self, boundary, n):
+        self.R = np.linspace(1.01, 5.0, n)
+        self.loop = _alpha_loop if boundary == 'alpha_star' else _z_loop
+
+    def time_fsolve_loop(self, boundary, n):
+        self.loop(self.R)
+
+
+class SolveBoundary:
+    """Batched, warm-started Newton solve on the same grid."""
+    params = [BOUNDARIES, [100, 10000, 1000000]]
+    param_names = ['boundary', 'n']
+
+    def setup(self, boundary, n):
+        self.R = np.linspace(1.01, 5.0, n)
+
+    def time_solve_boundary(self, boundary, n):
+        solve_boundary(boundary, self.R)
+
+    def peakmem_solve_boundary(self, boundary, n):
+        solve_boundary(boundary, self.R)
+
+
+class TraceBoundary:
+    """Adaptive continuation of the whole curve."""
+    params = [BOUNDARIES, [1e-4, 1e-8]]
+    param_names = ['boundary', 'tol']
+
+    def time_trace_boundary(self, boundary, tol):
+        trace_boundary(boundary, tol=tol)
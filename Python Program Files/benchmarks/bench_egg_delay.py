@@ -0,0 +1,72 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Benchmarks of the egg maturation delay model of
+% Section_4/Egg_Delay_Trajectory.py: the script's per-year solve_ivp loop
+% (BDF with 1000 output times), the scalar end-of-season solves of
+% egg_delay.trajectory, and the batched seasons of trajectory_batch, over
+% N and the batch size.
+"""
+
+# Import libraries:
+import numpy as np
+from scipy.integrate import solve_ivp
+
+from host_parasitoid.egg_delay import trajectory, trajectory_batch
+
+
+def _script_loop(N, beta=0.5, c=0.1, cr=1.0, R=2.0, k=1.0, T=1.0):
+    tau = np.linspace(0, T, int(1e3))
+    H = np.zeros(N + 1)
+    P = np.zeros(N + 1)
+    H[0] = 5
+    P[0] = 8
+    for t in range(N):
+        Y_0 = [R * H[t], 0, beta * P[t], (1 - beta) * P[t]]
+
+        def dYdtau(tau_, Y):
+            L, I, P0, P1 = Y
+            return [-c * L * P1, c * L * P1, c * L * P1 - cr * P0,
+                    -c * L * P1 + cr * P0]
+
+        sol = solve_ivp(dYdtau, [0, T], Y_0, t_eval=tau, method='BDF',
+                        rtol=1e-6, atol=1e-9)
+        H[t + 1] = sol.y[0][-1]
+        P[t + 1] = k * sol.y[1][-1]
+    return H, P
+
+
+class ScriptLoop:
+    """Per-year solve_ivp loop as written in the script."""
+    params = [10, 50]
+    param_names = ['N']
+
+    def time_script_loop(self, N):
+        _script_loop(N)
+
+
+class Trajectory:
+    """Scalar end-of-season solves with the analytic Jacobian."""
+    params = [[10, 50], ['BDF', 'LSODA']]
+    param_names = ['N', 'method']
+
+    def time_trajectory(self, N, method):
+        trajectory(5.0, 8.0, N, method=method)
+
+
+class TrajectoryBatch:
+    """All seasons of a sweep advanced together."""
+    params = [[10, 50], [1, 100, 1000], ['RK45', 'Rosenbrock']]
+    param_names = ['N', 'batch', 'method']
+
+    def setup(self, N, batch, method):
+        # Late seasons of long runs are stiff: minutes for RK45 or for
+        # large batches, so those are left out:
+        if N > 10 and (method == 'RK45' or batch > 100):
+            raise NotImplementedError
+        self.beta = np.linspace(0.1, 0.9, batch)
+
+    def time_trajectory_batch(self, N, batch, method):
+        trajectory_batch(5.0, 8.0, N, beta=self.beta, method=method)
+
+    def peakmem_trajectory_batch(self, N, batch, method):
+        trajectory_batch(5.0, 8.0, N, beta=self.beta, method=method)
@@ -0,0 +1,82 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Benchmarks of the map iteration of the Section_2 and Section_4
+% trajectory scripts: the scripts' own scalar year loop, and the batched
+% maps.iterate over N and the batch size.
+"""
+
+# Import libraries:
+import numpy as np
+
+from host_parasitoid.maps import iterate
+
+MODELS = ['nicholson_bailey', 'host_refuge', 'functional_response',
+          'host_mortality']
+
+# Parameters of the scripts (alpha and z as in the stable examples):
+PARAMS = {
+    'nicholson_bailey': {},
+    'host_refuge': {'alpha': 0.4},
+    'functional_response': {},
+    'host_mortality': {'z': 0.5},
+}
+
+
+# Year loops as written in the scripts, c = 0.1, k = 1, R = 2, T = 1:
+def _script_loop(model, N, H0=5.0, P0=8.0, c=0.1, k=1.0, R=2.0, T=1.0,
+                 alpha=0.4, z=0.5):
+    H = np.zeros(N + 1)
+    P = np.zeros(N + 1)
+    H[0] = H0
+    P[0] = P0
+    if model == 'nicholson_bailey':
+        f = lambda P: np.exp(-c * P)
+        for t in range(N):
+            H[t + 1] = R * H[t] * f(P[t])
+            P[t + 1] = k * R * H[t] * (1 - f(P[t]))
+    elif model == 'host_refuge':
+        f = lambda P: np.exp(-c * P)
+        for t in range(N):
+            H[t + 1] = alpha * R * H[t] + (1 - alpha) * R * H[t] * f(P[t])
+            P[t + 1] = k * (1 - alpha) * R * H[t] * (1 - f(P[t]))
+    elif model == 'functional_response':
+        f = lambda H, P: 1.0 / (1 + c * R * H * P * T)
+        for t in range(N):
+            H[t + 1] = R * H[t] * f(H[t], P[t])
+            P[t + 1] = k * R * H[t] * (1 - f(H[t], P[t]))
+    else:
+        cd = z * c * k
+        f = lambda H, P: np.exp(-c * P * T) / (
+            1 + cd * R * H * (-np.exp(-c * P * T) + 1) / (c * P))
+        g = lambda H, P: (P / z) * np.log(
+            1 + cd * R * H * (1 - np.exp(-c * P * T)) / (c * P))
+        for t in range(N):
+            H[t + 1] = R * H[t] * f(H[t], P[t])
+            P[t + 1] = g(H[t], P[t])
+    return H, P
+
+
+class ScriptLoop:
+    """Scalar year loop of a trajectory script."""
+    params = [MODELS, [50, 1000]]
+    param_names = ['model', 'N']
+
+    def time_script_loop(self, model, N):
+        _script_loop(model, N)
+
+
+class Iterate:
+    """Batched iteration of a whole sweep at once."""
+    params = [MODELS, [50, 1000], [1, 1000, 100000]]
+    param_names = ['model', 'N', 'batch']
+
+    def setup(self, model, N, batch):
+        if N * batch > 10**7:
+            raise NotImplementedError
+        self.H0 = np.full(batch, 5.0)
+
+    def time_iterate(self, model, N, batch):
+        iterate(model, self.H0, 8.0, N, **PARAMS[model])
+
+    def peakmem_iterate(self, model, N, batch):
+        iterate(model, self.H0, 8.0, N, **PARAMS[model])
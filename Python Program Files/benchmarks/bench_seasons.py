@@ -0,0 +1,55 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Benchmarks of the closed-form within-season solutions of Section_3
+% (Constant_Functional_ODE.py and Host_Mortality_Explicit_ODE.py),
+% evaluated on a grid of tau values for a batch of (H, P) states, and of
+% the numerical host mortality season they are checked against.
+"""
+
+# Import libraries:
+import numpy as np
+
+from host_parasitoid.host_mortality import season_end_batch, season_explicit
+
+
+def _constant(tau, H, P, c=0.1, R=2.0):
+    L = R * H * np.exp(-c * P * tau)
+    return L, R * H - L
+
+
+def _functional(tau, H, P, c=0.1, R=2.0):
+    L = (R * H) / (1 + c * R * H * P * tau)
+    return L, R * H - L
+
+
+CLOSED_FORMS = {'constant': _constant, 'functional': _functional,
+                'host_mortality': season_explicit}
+
+
+class ClosedForm:
+    """Closed-form L(tau), I(tau) on an (H, P) x tau grid."""
+    params = [sorted(CLOSED_FORMS), [1000, 100000], [1, 100]]
+    param_names = ['model', 'resolution', 'batch']
+
+    def setup(self, model, resolution, batch):
+        self.tau = np.linspace(0, 1, resolution)
+        self.H = np.linspace(1, 10, batch)[:, None]
+        self.fn = CLOSED_FORMS[model]
+
+    def time_closed_form(self, model, resolution, batch):
+        self.fn(self.tau, self.H, 8.0)
+
+    def peakmem_closed_form(self, model, resolution, batch):
+        self.fn(self.tau, self.H, 8.0)
+
+
+class HostMortalitySeason:
+    """Numerical end-of-season host mortality solve, for comparison."""
+    params = [[1, 100, 10000]]
+    param_names = ['batch']
+
+    def setup(self, batch):
+        self.H = np.linspace(1, 10, batch)
+
+    def time_season_end_batch(self, batch):
+        season_end_batch(self.H, 8.0)
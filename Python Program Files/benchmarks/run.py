@@ -0,0 +1,208 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This file runs the benchmark suite.  Benchmarks follow the conventions
+% of airspeed velocity (asv): every bench_*.py module in this folder holds
+% classes with optional ``params``/``param_names`` and ``setup``, and the
+% methods named time_* are timed while those named peakmem_* have the
+% peak memory they allocate measured with tracemalloc (NumPy reports its
+% array buffers to tracemalloc, so this includes the arrays).  Results can
+% be stored as a baseline and later runs compared against it:
+%   python -m benchmarks.run --save benchmarks/baseline.json
+%   python -m benchmarks.run --compare benchmarks/baseline.json
+% from inside the Python Program Files folder.
+"""
+
+# Import libraries:
+import argparse
+import gc
+import importlib
+import itertools
+import json
+import os
+import platform
+import re
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def discover():
+    """Yield (name, class, method name) for every benchmark in the suite."""
+    for file in sorted(os.listdir(HERE)):
+        if not (file.startswith('bench_') and file.endswith('.py')):
+            continue
+        module = importlib.import_module('benchmarks.' + file[:-3])
+        for cls_name in sorted(vars(module)):
+            cls = getattr(module, cls_name)
+            if not isinstance(cls, type) or cls.__module__ != module.__name__:
+                continue
+            for method in sorted(vars(cls)):
+                if method.startswith(('time_', 'peakmem_')):
+                    yield '%s.%s.%s' % (file[:-3], cls_name, method), cls, \
+                        method
+
+
+def _param_sets(cls):
+    # asv semantics: a single list of values, or a list of lists whose
+    # product is run:
+    params = getattr(cls, 'params', [])
+    if not params:
+        return [()]
+    if not isinstance(params[0], (list, tuple)):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def _label(cls, values):
+    if not values:
+        return ''
+    names = getattr(cls, 'param_names', None) or \
+        ['p%d' % i for i in range(len(values))]
+    return '(%s)' % ', '.join('%s=%r' % nv for nv in zip(names, values))
+
+
+def _time(fn, repeat, min_time):
+    # Calls per sample so that one sample lasts at least min_time:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    samples = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - start) / number)
+    return float(np.median(samples)), float(np.min(samples))
+
+
+def _peakmem(fn):
+    # Peak of memory allocated (and traced) during one call, in bytes:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run(pattern=None, repeat=5, min_time=0.05, verbose=True):
+    """
+    Run the benchmarks whose full name matches ``pattern`` (a regular
+    expression searched in ``module.Class.method(params)``).
+
+    Returns
+    -------
+    dict
+        For every benchmark, ``{'unit': 's', 'value': median, 'min': ...}``
+        for timings and ``{'unit': 'bytes', 'value': peak}`` for memory.
+    """
+    results = {}
+    for name, cls, method in discover():
+        for values in _param_sets(cls):
+            full = name + _label(cls, values)
+            if pattern and not re.search(pattern, full):
+                continue
+            bench = cls()
+            if hasattr(bench, 'setup'):
+                # As in asv, setup skips a combination by raising:
+                try:
+                    bench.setup(*values)
+                except NotImplementedError:
+                    continue
+            fn = getattr(bench, method)
+            call = (lambda: fn(*values))
+            if method.startswith('time_'):
+                median, best = _time(call, repeat, min_time)
+                results[full] = {'unit': 's', 'value': median, 'min': best}
+            else:
+                results[full] = {'unit': 'bytes', 'value': _peakmem(call)}
+            if hasattr(bench, 'teardown'):
+                bench.teardown(*values)
+            if verbose:
+                print('%-80s %s' % (full, _format(results[full])))
+    return results
+
+
+def _format(result):
+    value = result['value']
+    if result['unit'] == 'bytes':
+        for unit in ('B', 'KiB', 'MiB', 'GiB'):
+            if value < 1024 or unit == 'GiB':
+                return '%7.1f %s' % (value, unit)
+            value /= 1024
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if value >= scale or unit == 'us':
+            return '%7.2f %s' % (value / scale, unit)
+
+
+def compare(results, baseline, factor=1.2, verbose=True):
+    """
+    Compare results with a baseline.  Returns the names of benchmarks
+    that became slower (or use more memory) by more than ``factor``.
+    """
+    regressions = []
+    for name in sorted(set(results) & set(baseline)):
+        new = results[name]['value']
+        old = baseline[name]['value']
+        ratio = new / old if old else float('inf') if new else 1.0
+        mark = ''
+        if ratio > factor:
+            mark = '  slower' if results[name]['unit'] == 's' else '  larger'
+            regressions.append(name)
+        elif ratio < 1 / factor:
+            mark = '  faster' if results[name]['unit'] == 's' else '  smaller'
+        if verbose:
+            print('%-80s %s -> %s %6.2fx%s' % (name, _format(baseline[name]),
+                                               _format(results[name]), ratio,
+                                               mark))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run the host-parasitoid benchmark suite.')
+    parser.add_argument('-b', '--bench', default=None,
+                        help='regular expression selecting benchmarks')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='timing samples per benchmark (default: 5)')
+    parser.add_argument('--save', metavar='FILE',
+                        help='store the results as a baseline')
+    parser.add_argument('--compare', metavar='FILE',
+                        help='compare the results with a stored baseline')
+    parser.add_argument('--factor', type=float, default=1.2,
+                        help='ratio reported as a regression (default: 1.2)')
+    args = parser.parse_args(argv)
+
+    results = run(args.bench, repeat=args.repeat)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'machine': platform.node(),
+                       'python': platform.python_version(),
+                       'numpy': np.__version__,
+                       'date': time.strftime('%Y-%m-%d %H:%M:%S'),
+                       'results': results}, f, indent=1, sort_keys=True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        print()
+        regressions = compare(results, baseline, args.factor)
+        if regressions:
+            print('\n%d benchmark(s) regressed by more than %.2fx'
+                  % (len(regressions), args.factor))
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Shared, vectorized building blocks for the models of the chapter.  The
+% Section_* scripts remain the reference implementation of each figure;
+% this package is meant for large sweeps over the same models.
+% Submodules are imported on first use of one of their names, so that
+% ``import host_parasitoid`` (and the command line, python -m
+% host_parasitoid) costs little more than importing NumPy.
+"""
+
+# Import libraries:
+import importlib
+
+# Public name -> submodule that defines it:
+_EXPORTS = {
+    'basin_map': 'basins',
+    'alpha_star': 'boundaries', 'solve_boundary': 'boundaries',
+    'z_star': 'boundaries',
+    'ResultCache': 'cache', 'cache_key': 'cache',
+    'curve_values': 'continuation', 'trace_boundary': 'continuation',
+    'lyapunov': 'exponents',
+    'fit': 'fitting', 'loss_gradient': 'fitting',
+    'Lattice': 'lattice',
+    'bifurcation': 'logistic',
+    'MODELS': 'maps', 'get_model': 'maps', 'iterate': 'maps',
+    'iterate_chunks': 'maps',
+    'jacobian': 'maps', 'param_jacobian': 'maps', 'step': 'maps',
+    'Extrema': 'reducers', 'FirstCrossing': 'reducers',
+    'Histogram': 'reducers', 'LastK': 'reducers', 'Moments': 'reducers',
+    'summarize': 'reducers',
+    'regime_map': 'regimes',
+    'settle': 'settling',
+    'classify': 'stability', 'fixed_point': 'stability',
+    'jury_classify': 'stability',
+    'ensemble': 'stochastic',
+}
+
+__all__ = ['Extrema', 'FirstCrossing', 'Histogram', 'LastK', 'Lattice',
+           'MODELS', 'Moments', 'ResultCache', 'alpha_star', 'basin_map',
+           'bifurcation', 'cache_key', 'classify', 'curve_values', 'ensemble',
+           'fit', 'fixed_point', 'get_model', 'iterate', 'iterate_chunks',
+           'jacobian', 'jury_classify', 'loss_gradient', 'lyapunov',
+           'param_jacobian', 'regime_map', 'settle', 'solve_boundary',
+           'step', 'summarize', 'trace_boundary', 'z_star']
+
+
+def __getattr__(name):
+    try:
+        module = _EXPORTS[name]
+    except KeyError:
+        raise AttributeError('module %r has no attribute %r'
+                             % (__name__, name)) from None
+    value = getattr(importlib.import_module('.' + module, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,191 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module is the compute-only command line of the package:
+%   python -m host_parasitoid MODEL [options] -o OUTPUT
+% runs one of the chapter models and writes the numbers to a .npz file
+% (all arrays) or a .npy file (the main array only).  Nothing is plotted,
+% and model modules are only imported for the command that needs them, so
+% a worker process starts in about the time it takes to import NumPy.
+%
+% Parameter values are given as a number (2.5), a comma separated list
+% (1.5,2,2.5) or a linspace start:stop:num (1.01:5:100).  Every parameter
+% with more than one value becomes an axis of the output grid, in the
+% order H0, P0 and then the model's parameters.
+"""
+
+# Import libraries:
+import argparse
+import sys
+
+import numpy as np
+
+# Parameters of the command line models, in grid order:
+_MAP_PARAMS = {
+    'nicholson_bailey': ('R', 'c', 'k'),
+    'host_refuge': ('R', 'c', 'k', 'alpha'),
+    'functional_response': ('R', 'c', 'k', 'T'),
+    'host_mortality': ('R', 'c', 'k', 'z', 'T'),
+}
+_EGG_DELAY_PARAMS = ('beta', 'c', 'cr', 'R', 'k')
+
+
+def values(text):
+    """Parse a number, a comma separated list or a start:stop:num range."""
+    if ':' in text:
+        start, stop, num = text.split(':')
+        return np.linspace(float(start), float(stop), int(num))
+    return np.array([float(v) for v in text.split(',')])
+
+
+def _grid(args, names):
+    # Swept parameters as broadcastable axes (in the order of names),
+    # fixed ones as scalars; also returns the shape and axis values:
+    swept = [n for n in names if getattr(args, n) is not None
+             and getattr(args, n).size > 1]
+    grid = {}
+    for name in names:
+        v = getattr(args, name)
+        if v is None:
+            continue
+        if name in swept:
+            shape = [1] * len(swept)
+            shape[swept.index(name)] = v.size
+            grid[name] = v.reshape(shape)
+        else:
+            grid[name] = v[0]
+    shape = tuple(getattr(args, n).size for n in swept)
+    return grid, shape, {n: getattr(args, n) for n in swept}
+
+
+def _save(path, arrays):
+    # .npy holds the first array only, anything else becomes an .npz:
+    if path.endswith('.npy'):
+        np.save(path, next(iter(arrays.values())))
+    else:
+        np.savez(path, **arrays)
+
+
+def _cache(args):
+    # The result cache, if --cache was given:
+    if not args.cache:
+        return None
+    from .cache import ResultCache
+    return ResultCache()
+
+
+def _run_map(args):
+    from .maps import iterate
+    grid, shape, axes = _grid(args, ('H0', 'P0') + _MAP_PARAMS[args.model])
+    H0 = grid.pop('H0')
+    P0 = grid.pop('P0')
+    X = iterate(args.model, H0, P0, args.years, **grid)
+    return dict(X=X.reshape(shape + X.shape[1:]), **axes)
+
+
+def _run_egg_delay(args):
+    from .egg_delay import trajectory_batch
+    grid, shape, axes = _grid(args, ('H0', 'P0') + _EGG_DELAY_PARAMS)
+    res = trajectory_batch(grid.pop('H0'), grid.pop('P0'), args.years,
+                           T=args.T, method=args.method, rtol=args.rtol,
+                           atol=args.atol, cache=_cache(args), **grid)
+    X = np.stack([res.H, res.P], axis=-1)
+    return dict(X=X.reshape(shape + X.shape[1:]), **axes)
+
+
+def _run_logistic(args):
+    from .logistic import bifurcation
+    x = bifurcation(args.r, n_transient=args.transient, n_keep=args.keep,
+                    x0=args.x0, bins=args.bins)
+    return {'x': x, 'r': args.r}
+
+
+def _run_stability(args):
+    from .boundaries import solve_boundary
+    res = solve_boundary(args.boundary, args.R, xtol=args.xtol,
+                         cache=_cache(args))
+    return {'x': res.x, 'R': res.R, 'converged': res.converged}
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m host_parasitoid',
+        description='Run a host-parasitoid model and save the results.',
+        epilog='Values: a number, a list a,b,c or a range start:stop:num.')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def command(name, help, run):
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument('-o', '--output', required=True,
+                         help='output file (.npz, or .npy for one array)')
+        sub.set_defaults(run=run)
+        return sub
+
+    def cache_option(sub):
+        sub.add_argument('--cache', action='store_true',
+                         help='reuse results from the on-disk cache '
+                         '(HOST_PARASITOID_CACHE, default ~/.cache/'
+                         'host_parasitoid)')
+
+    def trajectory_options(sub, names, defaults):
+        sub.add_argument('-N', '--years', type=int, default=50,
+                         help='number of years (default: 50)')
+        sub.add_argument('--H0', type=values, default=values('5'),
+                         help='initial hosts (default: 5)')
+        sub.add_argument('--P0', type=values, default=values('8'),
+                         help='initial parasitoids (default: 8)')
+        for name in names:
+            default = defaults.get(name)
+            sub.add_argument('--' + name, type=values,
+                             default=None if default is None
+                             else values(repr(default)),
+                             help='(default: %s)' % default)
+
+    # Chapter defaults; alpha and z as in the stable script examples:
+    map_defaults = {'R': 2.0, 'c': 0.1, 'k': 1.0, 'alpha': 0.4, 'z': 0.5,
+                    'T': 1.0}
+    for model, names in _MAP_PARAMS.items():
+        sub = command(model, 'iterate the %s map' % model, _run_map)
+        trajectory_options(sub, names, map_defaults)
+        sub.set_defaults(model=model)
+
+    sub = command('egg_delay', 'iterate the egg maturation delay model',
+                  _run_egg_delay)
+    trajectory_options(sub, _EGG_DELAY_PARAMS,
+                       {'beta': 0.5, 'c': 0.1, 'cr': 1.0, 'R': 2.0,
+                        'k': 1.0})
+    sub.add_argument('--T', type=float, default=1.0,
+                     help='season length (default: 1)')
+    sub.add_argument('--method', default='Rosenbrock',
+                     choices=('RK45', 'Rosenbrock'),
+                     help='season solver (default: Rosenbrock)')
+    sub.add_argument('--rtol', type=float, default=1e-6)
+    sub.add_argument('--atol', type=float, default=1e-9)
+    cache_option(sub)
+
+    sub = command('logistic', 'logistic map bifurcation data',
+                  _run_logistic)
+    sub.add_argument('--r', type=values, default=values('2.5:4:1000'),
+                     help='growth rates (default: 2.5:4:1000)')
+    sub.add_argument('--transient', type=int, default=1000)
+    sub.add_argument('--keep', type=int, default=100)
+    sub.add_argument('--x0', type=float, default=0.5)
+    sub.add_argument('--bins', type=int, default=None,
+                     help='save histograms with this many bins instead')
+
+    sub = command('stability', 'stability region boundary alpha*(R) or '
+                  'z*(R)', _run_stability)
+    sub.add_argument('boundary', choices=('alpha_star', 'z_star'))
+    sub.add_argument('--R', type=values, default=values('1.01:5:100'),
+                     help='values of R (default: 1.01:5:100)')
+    sub.add_argument('--xtol', type=float, default=1e-12)
+    cache_option(sub)
+    return parser
+
+
+def main(argv=None):
+    args = _parser().parse_args(argv)
+    _save(args.output, args.run(args))
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module maps the basins of attraction of the discrete models over a
+% grid of initial conditions (H0, P0).  Every cell is iterated with
+% settling.settle and labelled by its long-run outcome (equilibrium, cycle,
+% extinction, divergence, or still running).  The grid is processed one
+% tile at a time and each tile's labels are written straight into the
+% output raster, which may be a .npy file on disk, so a 4096 x 4096 map
+% never holds more than one tile of trajectories in memory.
+"""
+
+# Import libraries:
+import numpy as np
+
+from .settling import settle
+
+
+def basin_map(model, H0, P0, N, path=None, tile=256, **kwargs):
+    """
+    Long-run outcome of every initial condition on an (H0, P0) grid.
+
+    Parameters
+    ----------
+    model : str
+        Model name, as in maps.iterate.
+    H0, P0 : array_like, 1-D
+        Grid axes of initial hosts and parasitoids.
+    N : int
+        Maximum number of years per cell.
+    path : str, optional
+        If given, the raster is written to this .npy file as it is
+        computed and returned as a read-only memory map.
+    tile : int
+        Side length of the square tiles computed at once.
+    **kwargs
+        Scalar model parameters and settle options (rtol, atol,
+        max_period, extinct, diverge).
+
+    Returns
+    -------
+    ndarray, shape (len(P0), len(H0)), int8
+        Outcome codes of settle (FIXED_POINT, CYCLE, EXTINCT, DIVERGED or
+        RUNNING); row i and column j hold the cell (H0[j], P0[i]), so the
+        raster displays with imshow(origin='lower') in (H, P) axes.
+    """
+    H0 = np.ravel(np.asarray(H0, dtype=float))
+    P0 = np.ravel(np.asarray(P0, dtype=float))
+    shape = (P0.size, H0.size)
+
+    # Output raster, in memory or on disk:
+    if path is None:
+        raster = np.empty(shape, dtype=np.int8)
+    else:
+        raster = np.lib.format.open_memmap(path, mode='w+', dtype=np.int8,
+                                           shape=shape)
+
+    # One tile of initial conditions at a time:
+    for i in range(0, shape[0], tile):
+        for j in range(0, shape[1], tile):
+            Hg, Pg = np.meshgrid(H0[j:j + tile], P0[i:i + tile])
+            result = settle(model, Hg, Pg, N, **kwargs)
+            raster[i:i + tile, j:j + tile] = result.status.reshape(Hg.shape)
+
+    if path is None:
+        return raster
+    raster.flush()
+    del raster
+    return np.load(path, mmap_mode='r')
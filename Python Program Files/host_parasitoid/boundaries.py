@@ -0,0 +1,204 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module computes the stability boundaries alpha*(R) of the host
+% refuge model (Section 2.3) and z*(R) of the host mortality model
+% (Section 4.2) for whole arrays of R at once.  Each boundary is the root
+% of a scalar equation that is bracketed on an explicit interval, so a
+% safeguarded Newton iteration (bisection whenever the Newton step leaves
+% the bracket) converges for every grid point.
+"""
+
+# Import libraries:
+from collections import namedtuple
+
+import numpy as np
+
+
+# Host refuge boundary:
+#   F(R, alpha) = (1 - alpha*R) R/(R - 1) ln((1 - alpha)R/(1 - alpha*R)) - 1
+# with the root bracketed by 0 < alpha* < 1/R.
+def _alpha_residual(a, R):
+    u = 1 - a * R
+    g = np.log1p(-a) + np.log(R) - np.log(u)
+    s = R / (R - 1)
+    return u * s * g - 1.0, s * (R - R * g - u / (1 - a))
+
+
+def _alpha_residual_R(a, R):
+    # Partial derivative of F with respect to R:
+    u = 1 - a * R
+    g = np.log1p(-a) + np.log(R) - np.log(u)
+    s = R / (R - 1)
+    return -a * s * g - u * g / (R - 1)**2 + u / (R - 1) + a * s
+
+
+def _alpha_bracket(R):
+    return np.zeros_like(R), 1.0 / R
+
+
+def _alpha_guess(R):
+    return 0.9 / R
+
+
+# Host mortality boundary:
+#   F(R, z) = R (ln(R) - z)/(R - e^z) - z - 1
+# with the root bracketed by 0 < z* < ln(R).
+def _z_residual(z, R):
+    n = np.log(R) - z
+    ez = np.exp(z)
+    d = R - ez
+    return R * n / d - z - 1.0, R * (n * ez - d) / d**2 - 1.0
+
+
+def _z_residual_R(z, R):
+    n = np.log(R) - z
+    d = R - np.exp(z)
+    return ((n + 1) * d - R * n) / d**2
+
+
+def _z_bracket(R):
+    return np.zeros_like(R), np.log(R)
+
+
+def _z_guess(R):
+    return 0.5 * np.log(R)
+
+
+# Boundary registry.  Each entry holds the residual F and dF/dx, dF/dR,
+# the bracket and initial guess for x, and the limit of x as R -> 1:
+Boundary = namedtuple('Boundary', ['residual', 'residual_R', 'bracket',
+                                   'guess', 'limit'])
+
+BOUNDARIES = {
+    'alpha_star': Boundary(_alpha_residual, _alpha_residual_R, _alpha_bracket,
+                           _alpha_guess, 0.5),
+    'z_star': Boundary(_z_residual, _z_residual_R, _z_bracket, _z_guess, 0.0),
+}
+
+BoundaryResult = namedtuple('BoundaryResult',
+                            ['R', 'x', 'converged', 'iterations', 'residual'])
+
+
+def get_boundary(name):
+    """Return the registry entry for a boundary name."""
+    try:
+        return BOUNDARIES[name]
+    except KeyError:
+        raise ValueError('unknown boundary %r; expected one of %s'
+                         % (name, ', '.join(sorted(BOUNDARIES)))) from None
+
+
+def _newton(residual, R, x, lo, hi, xtol, maxiter):
+    # Safeguarded Newton iteration on the active lanes only.  Every
+    # residual is decreasing in x, so F > 0 moves the lower bracket end.
+    x = x.copy()
+    lo = lo.copy()
+    hi = hi.copy()
+    converged = np.zeros(R.shape, dtype=bool)
+    iterations = np.zeros(R.shape, dtype=int)
+    active = np.flatnonzero(R > 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for _ in range(maxiter):
+            if active.size == 0:
+                break
+            xa = x[active]
+            f, df = residual(xa, R[active])
+
+            # Shrink the bracket around the root:
+            right = f > 0
+            la = np.where(right, xa, lo[active])
+            ha = np.where(right, hi[active], xa)
+            lo[active] = la
+            hi[active] = ha
+
+            # Newton step, falling back to bisection:
+            newton = xa - f / df
+            tol = xtol * (1 + np.abs(xa))
+            small = (f == 0) | (np.abs(newton - xa) <= tol)
+            bad = ~np.isfinite(newton) | (newton <= la) | (newton >= ha)
+            xn = np.where(bad, 0.5 * (la + ha), newton)
+            xn = np.where(small, np.where(bad, xa, newton), xn)
+
+            done = small | (ha - la <= tol)
+            x[active] = xn
+            iterations[active] += 1
+            converged[active[done]] = True
+            active = active[~done]
+    return x, converged, iterations
+
+
+def solve_boundary(name, R, xtol=1e-12, maxiter=100, warm_start=True,
+                   stride=16, cache=None):
+    """
+    Solve a stability boundary equation for every value in ``R``.
+
+    Parameters
+    ----------
+    name : str
+        ``alpha_star`` (host refuge) or ``z_star`` (host mortality).
+    R : array_like
+        Values of R > 1.
+    xtol : float
+        Relative step tolerance of the Newton iteration.
+    maxiter : int
+        Maximum number of iterations per point.
+    warm_start : bool
+        If True, every ``stride``-th point (in order of R) is solved first
+        from the heuristic guess of the chapter scripts, and the remaining
+        points start from an interpolation of those neighbouring roots.
+    cache : ResultCache, optional
+        Look the result up in this cache first (and store it on a miss).
+
+    Returns
+    -------
+    BoundaryResult
+        ``x`` holds the root for each R (NaN where R <= 1), together with
+        the per-point convergence flag, iteration count and final residual.
+    """
+    spec = get_boundary(name)
+    R = np.asarray(R, dtype=float)
+    if cache is not None:
+        return cache.memoize_tuple(
+            'boundaries.solve_boundary', BoundaryResult,
+            lambda boundary, **kw: solve_boundary(boundary, **kw),
+            boundary=name, R=R, xtol=xtol, maxiter=maxiter,
+            warm_start=warm_start, stride=stride)
+    shape = R.shape
+    R = R.ravel()
+    lo, hi = spec.bracket(np.where(R > 1, R, np.nan))
+    guess = spec.guess(R)
+
+    if warm_start and R.size > 2 * stride:
+        order = np.argsort(R)
+        coarse = np.union1d(order[::stride], order[-1:])
+        xc, cc, ic = _newton(spec.residual, R[coarse], guess[coarse],
+                             lo[coarse], hi[coarse], xtol, maxiter)
+        ok = cc & np.isfinite(xc)
+        if ok.sum() >= 2:
+            sort = np.argsort(R[coarse][ok])
+            guess = np.interp(R, R[coarse][ok][sort], xc[ok][sort])
+            guess = np.where((guess > lo) & (guess < hi), guess, spec.guess(R))
+        x, converged, iterations = _newton(spec.residual, R, guess, lo, hi,
+                                           xtol, maxiter)
+        iterations[coarse] += ic
+    else:
+        x, converged, iterations = _newton(spec.residual, R, guess, lo, hi,
+                                           xtol, maxiter)
+
+    x = np.where(R > 1, x, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        residual = spec.residual(x, R)[0]
+    return BoundaryResult(R.reshape(shape), x.reshape(shape),
+                          converged.reshape(shape), iterations.reshape(shape),
+                          residual.reshape(shape))
+
+
+def alpha_star(R, **kwargs):
+    """Host refuge stability boundary alpha*(R)."""
+    return solve_boundary('alpha_star', R, **kwargs).x
+
+
+def z_star(R, **kwargs):
+    """Host mortality stability boundary z*(R)."""
+    return solve_boundary('z_star', R, **kwargs).x
@@ -0,0 +1,216 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module keeps computed arrays on disk so that an unchanged sweep or
+% figure is not recomputed.  Every result is stored under a key that
+% hashes the name of the computation, its inputs (parameters, arrays and
+% solver settings) and the source code it depends on: the module named by
+% the first part of the name (e.g. egg_delay for
+% 'egg_delay.trajectory_batch') together with the package modules it
+% imports, directly or not.  A change to that code leads to new keys, so
+% old results are never reused, while edits elsewhere in the package keep
+% them valid.  Results are written as .npy files and read back as memory
+% maps, and the cache is trimmed to a size cap by evicting the least
+% recently used entries.
+"""
+
+# Import libraries:
+import ast
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+
+# Default cache directory (overridden by HOST_PARASITOID_CACHE):
+DEFAULT_DIR = os.path.join(os.path.expanduser('~'), '.cache',
+                           'host_parasitoid')
+
+# File name of a result that is a single array:
+_SINGLE = '__array__'
+
+_PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+_code_hashes = {}
+
+
+def _dependencies(module):
+    # The module and the package modules it imports, transitively:
+    seen = set()
+    todo = [module]
+    while todo:
+        name = todo.pop()
+        if name in seen:
+            continue
+        seen.add(name)
+        with open(os.path.join(_PACKAGE_DIR, name + '.py')) as f:
+            tree = ast.parse(f.read())
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom) and node.level == 1:
+                if node.module:
+                    todo.append(node.module.split('.')[0])
+                else:
+                    todo.extend(alias.name for alias in node.names)
+    return sorted(seen)
+
+
+def code_version(module=None):
+    """
+    Hash of the source of a package module (e.g. ``'egg_delay'``), the
+    modules it imports and this module.  Without a module, or for a name
+    that is not a module of the package, every module is hashed.
+    """
+    if module is None or not os.path.isfile(
+            os.path.join(_PACKAGE_DIR, '%s.py' % module)):
+        module = None
+    if module not in _code_hashes:
+        if module is None:
+            names = sorted(f[:-3] for f in os.listdir(_PACKAGE_DIR)
+                           if f.endswith('.py'))
+        else:
+            names = sorted(set(_dependencies(module)) | {'cache'})
+        h = hashlib.sha256()
+        for name in names:
+            h.update(name.encode())
+            with open(os.path.join(_PACKAGE_DIR, name + '.py'), 'rb') as f:
+                h.update(f.read())
+        _code_hashes[module] = h.hexdigest()
+    return _code_hashes[module]
+
+
+def _encode(value):
+    # JSON-compatible description of an input; arrays by content hash:
+    if isinstance(value, np.ndarray) or isinstance(value, np.generic):
+        a = np.ascontiguousarray(value)
+        return {'array': hashlib.sha256(a.tobytes()).hexdigest(),
+                'dtype': a.dtype.str, 'shape': list(a.shape)}
+    if isinstance(value, dict):
+        return {str(k): _encode(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_encode(v) for v in value]
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    raise TypeError('cannot hash cache input of type %s'
+                    % type(value).__name__)
+
+
+def cache_key(name, **inputs):
+    """
+    Key of a computation from its name (``module.function``), its inputs
+    and the version of the code it depends on.
+    """
+    blob = json.dumps({'name': name, 'inputs': _encode(inputs),
+                       'code': code_version(name.split('.')[0])},
+                      sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:32]
+
+
+def _entry_size(path):
+    return sum(os.path.getsize(os.path.join(path, f))
+               for f in os.listdir(path))
+
+
+class ResultCache:
+    """
+    On-disk cache of named arrays with a least-recently-used size cap.
+
+    Each entry is a directory holding one .npy file per array.  Reading
+    an entry marks it as used; writing one evicts the least recently used
+    entries until the cache is at most ``max_bytes`` large.
+    """
+
+    def __init__(self, directory=None, max_bytes=2 * 1024**3):
+        if directory is None:
+            directory = os.environ.get('HOST_PARASITOID_CACHE', DEFAULT_DIR)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """
+        Read-only memory-mapped result stored under ``key`` (an array or a
+        dict of arrays, as it was stored), or None if there is no entry.
+        """
+        path = self._path(key)
+        try:
+            names = sorted(f for f in os.listdir(path) if f.endswith('.npy'))
+            result = {f[:-4]: np.load(os.path.join(path, f), mmap_mode='r')
+                      for f in names}
+        except FileNotFoundError:
+            return None
+        os.utime(path)
+        if list(result) == [_SINGLE]:
+            return result[_SINGLE]
+        return result
+
+    def put(self, key, value):
+        """
+        Store an array or a dict of arrays under ``key`` and enforce the
+        size cap.
+        """
+        arrays = value if isinstance(value, dict) else {_SINGLE: value}
+        tmp = tempfile.mkdtemp(dir=self.directory, prefix='.tmp-')
+        try:
+            for name, a in arrays.items():
+                np.save(os.path.join(tmp, '%s.npy' % name), np.asarray(a))
+            path = self._path(key)
+            if os.path.isdir(path):
+                shutil.rmtree(path)
+            os.replace(tmp, path)
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.evict(keep=key)
+
+    def evict(self, keep=None):
+        """
+        Remove least recently used entries beyond ``max_bytes``, except
+        the entry ``keep``.
+        """
+        entries = []
+        for key in os.listdir(self.directory):
+            path = self._path(key)
+            if (key.startswith('.') or key == keep
+                    or not os.path.isdir(path)):
+                continue
+            entries.append((os.path.getmtime(path), _entry_size(path), path))
+        total = sum(size for _, size, _ in entries)
+        if keep is not None and os.path.isdir(self._path(keep)):
+            total += _entry_size(self._path(keep))
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
+
+    def clear(self):
+        """Remove every entry."""
+        for key in os.listdir(self.directory):
+            shutil.rmtree(self._path(key), ignore_errors=True)
+
+    def memoize(self, name, fn, **inputs):
+        """
+        Return ``fn(**inputs)`` from the cache, computing and storing it
+        on a miss.  ``fn`` must return an array or a dict of arrays; the
+        result is always read back as memory maps of the stored files.
+        """
+        key = cache_key(name, **inputs)
+        result = self.get(key)
+        if result is None:
+            self.put(key, fn(**inputs))
+            result = self.get(key)
+        return result
+
+    def memoize_tuple(self, name, cls, fn, **inputs):
+        """
+        Like ``memoize`` for a function returning the namedtuple ``cls``:
+        array fields come back as memory maps and scalar fields as NumPy
+        scalars.
+        """
+        result = self.memoize(name, lambda **kw: fn(**kw)._asdict(),
+                              **inputs)
+        return cls(**{f: result[f][()] if result[f].ndim == 0 else result[f]
+                      for f in cls._fields})
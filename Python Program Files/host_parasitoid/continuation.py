@@ -0,0 +1,216 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module traces the stability boundaries alpha*(R) and z*(R) of
+% boundaries.py as curves F(R, x) = 0 by pseudo-arclength continuation.
+% Each step predicts along the curve and corrects with Newton's method on
+% F together with the arclength condition, so the tracer also passes
+% through folds where the curve turns back in R.  The step length is set
+% from the distance between the corrected point and a cubic extrapolation
+% of the previous two, so points are dense where the curve bends and
+% sparse where it is straight, and the points with their slopes dx/dR
+% define a cubic Hermite interpolant of the boundary.
+"""
+
+# Import libraries:
+from collections import namedtuple
+
+import numpy as np
+
+from .boundaries import get_boundary, solve_boundary
+
+# How the trace ended:
+REACHED_END = 0   # the lower end of R_range was reached
+LIMIT = 1         # the curve was followed into the R -> 1 limit
+STALLED = 2       # the step length fell below ds_min
+MAX_POINTS = 3    # max_points curve points were computed
+
+BoundaryCurve = namedtuple('BoundaryCurve', ['R', 'x', 'slope', 'folds',
+                                             'status', 'evaluations'])
+
+
+def _gradient(spec, R, x):
+    f, fx = spec.residual(x, R)
+    return f, spec.residual_R(x, R), fx
+
+
+def _tangent(fR, fx, previous):
+    # Unit tangent of F = 0, oriented along the previous tangent:
+    t = np.array([-fx, fR]) / np.hypot(fR, fx)
+    return t if t @ previous >= 0 else -t
+
+
+def _corrector(spec, u, anchor, normal, xtol, maxiter):
+    # Newton's method from u on F(u) = 0, normal.(u - anchor) = 0.  Returns
+    # the corrected point, the gradient there, and the number of
+    # evaluations (the point is None if Newton's method failed).  Near
+    # R = 1 the residual is only known to rounding error, so a step that
+    # stops shrinking within 1000 xtol of convergence is also accepted:
+    last = np.inf
+    for n in range(1, maxiter + 1):
+        f, fR, fx = _gradient(spec, *u)
+        g = normal @ (u - anchor)
+        det = fR * normal[1] - fx * normal[0]
+        du = np.array([(f * normal[1] - fx * g) / det,
+                       (fR * g - f * normal[0]) / det])
+        u = u - du
+        if not np.all(np.isfinite(u)):
+            return None, None, n
+        size = np.max(np.abs(du) / (1 + np.abs(u)))
+        if size <= xtol or (size <= 1e3 * xtol and size >= 0.5 * last):
+            f, fR, fx = _gradient(spec, *u)
+            return u, (fR, fx), n + 1
+        last = size
+    return None, None, maxiter
+
+
+def _extrapolate(u0, t0, u1, t1, ds):
+    # Cubic Hermite extrapolation in arclength through the last two points:
+    h = np.hypot(*(u1 - u0))
+    s = 1 + ds / h
+    return ((1 + 2 * s) * (1 - s)**2 * u0 + s * (1 - s)**2 * h * t0
+            + s**2 * (3 - 2 * s) * u1 + s**2 * (s - 1) * h * t1)
+
+
+def trace_boundary(name, R_range=(1.01, 5.0), ds=0.05, ds_min=1e-8,
+                   ds_max=0.5, tol=1e-6, angle=0.1, xtol=1e-12, maxiter=8,
+                   R_eps=1e-3, max_points=10000):
+    """
+    Trace a stability boundary by pseudo-arclength continuation.
+
+    Parameters
+    ----------
+    name : str
+        ``alpha_star`` (host refuge) or ``z_star`` (host mortality).
+    R_range : (float, float)
+        The curve is started at R_range[1] and followed towards smaller R
+        until R_range[0].  If R_range[0] <= 1 it is followed to R = 1 + R_eps
+        and closed with the limit point (1, x(1)).
+    ds : float
+        Initial arclength step in the (R, x) plane.
+    ds_min, ds_max : float
+        Bounds on the step length.
+    tol : float
+        Target distance between each new point and its cubic Hermite
+        extrapolation from the previous two; the step length is chosen so
+        that this local error estimate stays near ``tol``.  The error of
+        the interpolant between points is typically far smaller.
+    angle : float
+        Largest turning angle (radians) of the tangent per step.
+    xtol : float
+        Relative tolerance of the Newton corrector.
+    maxiter : int
+        Corrector iterations before a step is retried with half the length.
+
+    Steps whose error estimate exceeds ``4 * tol``, that turn by more than
+    ``angle``, or whose corrector fails are retried with half the length.
+
+    Returns
+    -------
+    BoundaryCurve
+        Points (R, x) on the curve in order of increasing arclength from
+        the lower end, the slopes dx/dR there, a list of (R, x) fold
+        locations, the status code (REACHED_END, LIMIT, STALLED or
+        MAX_POINTS) and the total number of residual evaluations.
+    """
+    spec = get_boundary(name)
+    R_lo, R_hi = map(float, R_range)
+    R_stop = max(R_lo, 1 + R_eps)
+
+    # Starting point and tangent, pointing towards smaller R:
+    start = solve_boundary(name, np.array([R_hi]), xtol=xtol)
+    evaluations = int(start.iterations[0]) + 1
+    u = np.array([R_hi, start.x[0]])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f, fR, fx = _gradient(spec, *u)
+    t = _tangent(fR, fx, np.array([-1.0, 0.0]))
+    points = [u]
+    tangents = [t]
+    gradients = [(fR, fx)]
+    folds = []
+    status = MAX_POINTS
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        while len(points) < max_points:
+            if ds < ds_min:
+                status = STALLED
+                break
+
+            # Predict along the curve; the last step lands on R = R_stop:
+            step = ds
+            last = t[0] < 0 and u[0] + ds * t[0] <= R_stop
+            if last:
+                step = (u[0] - R_stop) / -t[0]
+            if len(points) > 1:
+                guess = _extrapolate(points[-2], tangents[-2], u, t, step)
+            else:
+                guess = u + step * t
+            if last:
+                anchor, normal = np.array([R_stop, 0.0]), np.array([1.0, 0.0])
+                guess[0] = R_stop
+            else:
+                anchor, normal = u + step * t, t
+            un, grad, n = _corrector(spec, guess, anchor, normal, xtol,
+                                     maxiter)
+            evaluations += n
+            if un is None:
+                ds *= 0.5
+                continue
+
+            # Local error and turning angle of the step:
+            tn = _tangent(grad[0], grad[1], t)
+            turn = np.arccos(np.clip(t @ tn, -1.0, 1.0))
+            err = np.hypot(*(un - guess)) if len(points) > 1 else 0.0
+            if turn > angle or err > 4 * tol:
+                ds = 0.5 * step
+                continue
+
+            # Accept the step; a sign change of dR/ds is a fold:
+            if tn[0] * t[0] < 0:
+                w = t[0] / (t[0] - tn[0])
+                folds.append(tuple((1 - w) * u + w * un))
+            u, t = un, tn
+            points.append(u)
+            tangents.append(t)
+            gradients.append(grad)
+            if last:
+                status = REACHED_END
+                break
+            grow = 2.0 if err == 0 else 0.9 * (tol / err)**0.25
+            ds = min(ds_max, step * np.clip(grow, 0.5, 2.0))
+
+    points = np.array(points[::-1])
+    gradients = np.array(gradients[::-1])
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = -gradients[:, 0] / gradients[:, 1]
+
+    # Close the curve at R = 1:
+    if status == REACHED_END and R_lo <= 1:
+        status = LIMIT
+        points = np.vstack([[1.0, spec.limit], points])
+        slope = np.concatenate([[(points[1, 1] - points[0, 1])
+                                 / (points[1, 0] - points[0, 0])], slope])
+    return BoundaryCurve(points[:, 0], points[:, 1], slope, folds, status,
+                         evaluations)
+
+
+def curve_values(curve, R):
+    """
+    Evaluate a traced boundary at ``R`` by cubic Hermite interpolation.
+
+    The curve must be single-valued in R (no folds); values outside the
+    traced range are NaN.
+    """
+    if curve.folds:
+        raise ValueError('curve has folds; x(R) is not single-valued')
+    R = np.asarray(R, dtype=float)
+    Rn, xn, mn = curve.R, curve.x, curve.slope
+    i = np.clip(np.searchsorted(Rn, R) - 1, 0, Rn.size - 2)
+    h = Rn[i + 1] - Rn[i]
+    s = (R - Rn[i]) / h
+    h00 = (1 + 2 * s) * (1 - s)**2
+    h10 = s * (1 - s)**2
+    h01 = s**2 * (3 - 2 * s)
+    h11 = s**2 * (s - 1)
+    x = (h00 * xn[i] + h10 * h * mn[i] + h01 * xn[i + 1]
+         + h11 * h * mn[i + 1])
+    return np.where((R >= Rn[0]) & (R <= Rn[-1]), x, np.nan)
@@ -0,0 +1,86 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module computes the Lyapunov exponents of the discrete models for
+% a batch of initial conditions and parameters.  The tangent map (the 2x2
+% Jacobian of each year) is applied to an orthonormal frame alongside the
+% trajectory, and the frame is re-orthonormalised by a closed-form 2x2 QR
+% factorization every few years.  The exponents are the time averages of
+% the logarithms of the diagonal of R.  A positive largest exponent
+% signals chaos, a zero one neutral cycles, and a negative one a stable
+% equilibrium or cycle.
+"""
+
+# Import libraries:
+import numpy as np
+
+from .maps import broadcast_batch, get_model, model_params
+
+
+def _qr_update(q00, q01, q10, q11, sums):
+    # Gram-Schmidt QR of the frame [[q00, q01], [q10, q11]], adding the
+    # logarithms of the diagonal of R to ``sums`` and returning Q:
+    r11 = np.hypot(q00, q10)
+    e00 = q00 / r11
+    e10 = q10 / r11
+    r12 = e00 * q01 + e10 * q11
+    v01 = q01 - r12 * e00
+    v11 = q11 - r12 * e10
+    r22 = np.hypot(v01, v11)
+    sums[:, 0] += np.log(r11)
+    sums[:, 1] += np.log(r22)
+    return e00, v01 / r22, e10, v11 / r22
+
+
+def lyapunov(model, H0, P0, N, n_transient=100, reorth=5, **params):
+    """
+    Lyapunov exponents of a discrete host-parasitoid map.
+
+    Parameters
+    ----------
+    model : str
+        Model name, as in maps.iterate.
+    H0, P0 : array_like
+        Initial populations, broadcast with the parameters.
+    N : int
+        Number of years averaged over.
+    n_transient : int
+        Years iterated (without the tangent map) before averaging.
+    reorth : int
+        Re-orthonormalise the tangent frame every ``reorth`` years.
+    **params : array_like
+        Model parameters.
+
+    Returns
+    -------
+    ndarray, shape (batch, 2)
+        The largest and smallest Lyapunov exponents of each trajectory.
+        Trajectories that overflow or go extinct (H or P not positive
+        and finite after the N years) give NaN for both exponents.
+    """
+    spec = get_model(model)
+    H, P, p = broadcast_batch(H0, P0, model_params(model, params))
+    sums = np.zeros((H.size, 2))
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        # Discard the transient:
+        for _ in range(n_transient):
+            H, P = spec.step(H, P, **p)
+
+        # Tangent map iteration from the identity frame:
+        q00 = np.ones_like(H)
+        q01 = np.zeros_like(H)
+        q10 = np.zeros_like(H)
+        q11 = np.ones_like(H)
+        for t in range(N):
+            a, b, c, d = spec.jacobian(H, P, **p)
+            q00, q01, q10, q11 = (a * q00 + b * q10, a * q01 + b * q11,
+                                  c * q00 + d * q10, c * q01 + d * q11)
+            H, P = spec.step(H, P, **p)
+            if (t + 1) % reorth == 0 or t == N - 1:
+                q00, q01, q10, q11 = _qr_update(q00, q01, q10, q11, sums)
+
+    # Extinction and overflow are absorbing for every model, so the final
+    # state tells whether a trajectory was lost:
+    lost = ~((H > 0) & (P > 0) & np.isfinite(H) & np.isfinite(P))
+    sums[lost] = np.nan
+    return sums / N
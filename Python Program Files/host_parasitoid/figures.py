@@ -0,0 +1,185 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module rebuilds the figures of all chapter sections in one go.
+% The figure scripts Section_*/*.py are discovered next to this package
+% and rendered headless (see render.py) in a pool of processes.  A
+% manifest in the output directory records, for every script, a hash of
+% its source and of the render settings and code; scripts whose hash is
+% unchanged and whose files still exist are skipped, so a rebuild without
+% changes only reads the sources.  The manifest is rewritten as every
+% script finishes, so an interrupted build keeps the figures it made, and
+% a script that fails does not stop the others; failures are reported at
+% the end.  Run as
+%   python -m host_parasitoid.figures [--out DIR] [--workers N] [--force]
+% from inside the Python Program Files folder.
+"""
+
+# Import libraries:
+import argparse
+import glob
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .render import FORMATS
+
+# Folder holding the Section_* directories:
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_RENDER_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                              'render.py')
+
+
+def discover(root=ROOT):
+    """Paths of all figure scripts, relative to ``root``, in order."""
+    paths = glob.glob(os.path.join(root, 'Section_*', '*.py'))
+    return sorted(os.path.relpath(p, root) for p in paths)
+
+
+def figure_hash(root, script, settings):
+    """Hash of a script's source, the render code and the settings."""
+    h = hashlib.sha256()
+    for path in (os.path.join(root, script), _RENDER_SOURCE):
+        with open(path, 'rb') as f:
+            h.update(f.read())
+    h.update(json.dumps(settings, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+def _write_manifest(path, manifest):
+    # Write to a temporary file first, so the manifest is never partial:
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def _build_one(task):
+    # Render one script in a worker process:
+    root, script, out_dir, settings = task
+    from .render import render_script
+    start = time.perf_counter()
+    outputs = render_script(os.path.join(root, script),
+                            os.path.join(out_dir, os.path.dirname(script)),
+                            **settings)
+    return script, [os.path.relpath(p, out_dir) for p in outputs], \
+        time.perf_counter() - start
+
+
+def build(out_dir='figures', root=ROOT, workers=None, force=False,
+          formats=FORMATS, max_points=4000, dpi=150, verbose=True):
+    """
+    Render every figure script whose inputs changed since the last build.
+
+    Parameters
+    ----------
+    out_dir : str
+        Output directory; figures go to ``out_dir/Section_n/``.
+    root : str
+        Folder holding the Section_* directories.
+    workers : int, optional
+        Number of processes (default: one per CPU).
+    force : bool
+        Rebuild every figure.
+    formats, max_points, dpi
+        Passed to render.render_script.
+    verbose : bool
+        Print one line per script with its status and wall time.
+
+    Returns
+    -------
+    dict
+        The manifest: for each script its hash, output files, and the
+        wall time of its last build in seconds.
+
+    Raises
+    ------
+    RuntimeError
+        If any script failed, after all others were built and the
+        manifest was written.
+    """
+    settings = {'formats': list(formats), 'max_points': max_points,
+                'dpi': dpi}
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, 'manifest.json')
+    try:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        manifest = {}
+
+    # Scripts to rebuild:
+    hashes = {s: figure_hash(root, s, settings) for s in discover(root)}
+    todo = []
+    for script, digest in hashes.items():
+        entry = manifest.get(script)
+        fresh = (entry is not None and entry['hash'] == digest
+                 and all(os.path.exists(os.path.join(out_dir, p))
+                         for p in entry['outputs']))
+        if force or not fresh:
+            todo.append(script)
+        elif verbose:
+            print('%-50s %8s' % (script, 'skipped'))
+
+    # Forget scripts that no longer exist:
+    manifest = {s: e for s, e in manifest.items() if s in hashes}
+    _write_manifest(manifest_path, manifest)
+
+    failures = {}
+    if todo:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = {pool.submit(_build_one, (root, s, out_dir, settings)):
+                       s for s in todo}
+            for future in as_completed(futures):
+                script = futures[future]
+                try:
+                    _, outputs, seconds = future.result()
+                except Exception as e:
+                    failures[script] = '%s: %s' % (type(e).__name__, e)
+                    # Build it again next time, even if its files exist:
+                    manifest.pop(script, None)
+                    if verbose:
+                        print('%-50s %8s' % (script, 'failed'))
+                else:
+                    manifest[script] = {'hash': hashes[script],
+                                        'outputs': outputs,
+                                        'seconds': seconds}
+                    if verbose:
+                        print('%-50s %7.2fs' % (script, seconds))
+                _write_manifest(manifest_path, manifest)
+
+    if failures:
+        raise RuntimeError('%d figure script(s) failed:\n%s' % (
+            len(failures), '\n'.join('  %s: %s' % f
+                                     for f in sorted(failures.items()))))
+    return manifest
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Rebuild the chapter figures that changed.')
+    parser.add_argument('--out', default='figures',
+                        help='output directory (default: figures)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='number of processes (default: all CPUs)')
+    parser.add_argument('--force', action='store_true',
+                        help='rebuild every figure')
+    parser.add_argument('--formats', nargs='+', default=list(FORMATS),
+                        help='output formats (default: png pdf)')
+    args = parser.parse_args(argv)
+    start = time.perf_counter()
+    try:
+        build(args.out, workers=args.workers, force=args.force,
+              formats=args.formats)
+    except RuntimeError as e:
+        print(e, file=sys.stderr)
+        return 1
+    finally:
+        print('%-50s %7.2fs' % ('total', time.perf_counter() - start))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module fits the parameters of the discrete models to observed
+% (H_t, P_t) time series.  The model is run for a whole batch of series
+% and candidate parameter vectors at once, and the derivatives of the
+% trajectory with respect to the parameters are propagated alongside it
+% by the forward sensitivity recursion
+%   S_{t+1} = J_x(x_t) S_t + J_theta(x_t),
+% which gives the exact gradient of the least-squares loss and the
+% Gauss-Newton matrix in the same pass.  Every candidate then takes
+% Levenberg-Marquardt steps with its own damping, and several random
+% starts per series are run side by side as extra lanes of the batch.
+"""
+
+# Import libraries:
+from collections import namedtuple
+
+import numpy as np
+
+from .maps import get_model, model_params
+
+# Sampling ranges for random starts (H0 and P0 start at the data):
+BOUNDS = {'R': (1.1, 10.0), 'c': (0.01, 1.0), 'k': (0.2, 5.0),
+          'alpha': (0.05, 0.95), 'z': (0.05, 2.0), 'T': (0.2, 5.0)}
+
+# Parameters fitted on the logit scale; all others on the log scale:
+_LOGIT = ('alpha',)
+
+FitResult = namedtuple('FitResult', ['params', 'loss', 'converged',
+                                     'iterations', 'start_loss'])
+
+
+def _prepare(data):
+    # Observations as (series, years, 2) with a mask of finite values:
+    Y = np.asarray(data, dtype=float)
+    if Y.ndim == 2:
+        Y = Y[None]
+    return Y, np.isfinite(Y)
+
+
+def _residual(X, Y, mask, scale):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if scale == 'log':
+            r = np.log(X) - np.log(Y)
+        else:
+            r = X - Y
+    return np.where(mask, r, 0.0)
+
+
+def loss_gradient(model, data, free, scale='log', H0=None, P0=None,
+                  **params):
+    """
+    Least-squares loss and its exact gradient for a batch of candidates.
+
+    Parameters
+    ----------
+    model : str
+        Model name, as in maps.iterate.
+    data : array_like, shape (batch, years, 2) or (years, 2)
+        Observed hosts and parasitoids; NaN marks a missing value.
+    free : sequence of str
+        Names of the parameters to differentiate by; may include 'H0'
+        and 'P0'.
+    scale : str
+        ``log`` (residuals of log populations) or ``linear``.
+    H0, P0 : array_like, optional
+        Initial populations; by default the first observation.
+    **params : array_like
+        Model parameters, broadcast over the batch.
+
+    Returns
+    -------
+    loss : ndarray, shape (batch,)
+        Half the sum of squared residuals (inf where the model breaks
+        down).
+    grad : ndarray, shape (batch, len(free))
+        Its derivatives with respect to the ``free`` parameters.
+    """
+    Y, mask = _prepare(data)
+    loss, grad, _ = _accumulate(model, Y, mask, tuple(free), scale, H0, P0,
+                                params)
+    return loss, grad
+
+
+def _accumulate(model, Y, mask, free, scale, H0, P0, params):
+    # One pass of the model with forward sensitivities, returning the
+    # loss, the gradient and the Gauss-Newton matrix for every lane:
+    spec = get_model(model)
+    batch, years = Y.shape[0], Y.shape[1]
+    p = model_params(model, params)
+    p = {name: np.broadcast_to(np.asarray(v, dtype=float), (batch,))
+         for name, v in p.items()}
+    H = np.broadcast_to(Y[:, 0, 0] if H0 is None else H0, (batch,)) + 0.0
+    P = np.broadcast_to(Y[:, 0, 1] if P0 is None else P0, (batch,)) + 0.0
+
+    # Sensitivities of H_t and P_t to the free parameters:
+    q = len(free)
+    sH = np.zeros((batch, q))
+    sP = np.zeros((batch, q))
+    if 'H0' in free:
+        sH[:, free.index('H0')] = 1
+    if 'P0' in free:
+        sP[:, free.index('P0')] = 1
+    model_free = [(i, name) for i, name in enumerate(free)
+                  if name not in ('H0', 'P0')]
+
+    loss = np.zeros(batch)
+    grad = np.zeros((batch, q))
+    gn = np.zeros((batch, q, q))
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for t in range(years):
+            # Residuals at year t and their parameter derivatives:
+            for j, X, S in ((0, H, sH), (1, P, sP)):
+                r = _residual(X, Y[:, t, j], mask[:, t, j], scale)
+                dr = S / X[:, None] if scale == 'log' else S
+                dr = np.where(mask[:, t, j, None], dr, 0.0)
+                loss += 0.5 * r**2
+                grad += r[:, None] * dr
+                gn += dr[:, :, None] * dr[:, None, :]
+            if t == years - 1:
+                break
+
+            # Advance the state and the sensitivities:
+            a, b, c, d = spec.jacobian(H, P, **p)
+            dp = spec.param_jacobian(H, P, **p)
+            sH, sP = (a[:, None] * sH + b[:, None] * sP,
+                      c[:, None] * sH + d[:, None] * sP)
+            for i, name in model_free:
+                sH[:, i] += dp[name][0]
+                sP[:, i] += dp[name][1]
+            H, P = spec.step(H, P, **p)
+
+    bad = ~np.isfinite(loss) | ~np.all(np.isfinite(grad), axis=1)
+    loss[bad] = np.inf
+    return loss, grad, gn
+
+
+def _to_internal(name, v):
+    return np.log(v / (1 - v)) if name in _LOGIT else np.log(v)
+
+
+def _from_internal(name, u):
+    # Value and derivative d(value)/d(internal):
+    if name in _LOGIT:
+        v = 1 / (1 + np.exp(-u))
+        return v, v * (1 - v)
+    v = np.exp(u)
+    return v, v
+
+
+def _solve(A, b):
+    # Batched solve of A x = b, by least squares for singular systems:
+    try:
+        return np.linalg.solve(A, b[:, :, None])[:, :, 0]
+    except np.linalg.LinAlgError:
+        return np.stack([np.linalg.lstsq(a, v, rcond=None)[0]
+                         for a, v in zip(A, b)])
+
+
+def fit(model, data, free=('R', 'c'), n_starts=8, start=None, bounds=None,
+        scale='log', maxiter=200, tol=1e-10, seed=0, **fixed):
+    """
+    Fit model parameters to one or many observed time series.
+
+    Parameters
+    ----------
+    model : str
+        Model name, as in maps.iterate.
+    data : array_like, shape (series, years, 2) or (years, 2)
+        Observed hosts and parasitoids; NaN marks a missing value.
+    free : sequence of str
+        Parameters to fit; may include 'H0' and 'P0' (otherwise the run
+        starts from the first observation).
+    n_starts : int
+        Random starts per series, drawn log-uniformly (uniformly for
+        alpha) from ``bounds``.
+    start : dict, optional
+        Starting values used for the first start of every series.
+    bounds : dict, optional
+        Sampling ranges overriding ``BOUNDS``.
+    scale : str
+        ``log`` or ``linear`` residuals.
+    maxiter : int
+        Levenberg-Marquardt iterations.
+    tol : float
+        A lane has converged once a step lowers its loss by less than
+        ``tol * (1 + loss)``.
+    seed : int
+        Seed of the random starts.
+    **fixed : array_like
+        Values of the parameters that are not fitted (defaults as in the
+        chapter scripts), broadcast over the series.
+
+    Returns
+    -------
+    FitResult
+        For every series the best parameters over all starts (a dict of
+        arrays of shape (series,)), their loss and convergence flag and
+        the iterations used, plus the final loss of every start, of shape
+        (series, n_starts).
+    """
+    free = tuple(free)
+    spec = get_model(model)
+    unknown = set(free) - set(spec.params) - {'H0', 'P0'}
+    if unknown:
+        raise ValueError('unknown parameter(s) for %s: %s'
+                         % (model, ', '.join(sorted(unknown))))
+    if scale not in ('log', 'linear'):
+        raise ValueError("unknown scale %r; expected log or linear"
+                         % (scale,))
+    Y, mask = _prepare(data)
+    series = Y.shape[0]
+    batch = series * n_starts
+    Yb = np.repeat(Y, n_starts, axis=0)
+    mb = np.repeat(mask, n_starts, axis=0)
+    ranges = dict(BOUNDS)
+    ranges.update(bounds or {})
+
+    # Random starts in internal (log or logit) coordinates:
+    rng = np.random.default_rng(seed)
+    u = np.empty((batch, len(free)))
+    for i, name in enumerate(free):
+        if name in ('H0', 'P0'):
+            obs = Yb[:, 0, 0 if name == 'H0' else 1]
+            u[:, i] = np.log(obs) + rng.normal(0, 0.1, batch)
+        else:
+            lo, hi = ranges[name]
+            if name in _LOGIT:
+                v = rng.uniform(lo, hi, batch)
+            else:
+                v = np.exp(rng.uniform(np.log(lo), np.log(hi), batch))
+            u[:, i] = _to_internal(name, v)
+        if start and name in start:
+            u[::n_starts, i] = _to_internal(name, start[name])
+    fixed = {name: np.repeat(np.broadcast_to(np.asarray(v, dtype=float),
+                                             (series,)), n_starts)
+             for name, v in fixed.items()}
+
+    def evaluate(u, idx):
+        # Loss, gradient and Gauss-Newton matrix of the lanes idx:
+        values = {}
+        scale_u = np.empty_like(u)
+        for i, name in enumerate(free):
+            values[name], scale_u[:, i] = _from_internal(name, u[:, i])
+        H0 = values.pop('H0', None)
+        P0 = values.pop('P0', None)
+        params = {name: v[idx] for name, v in fixed.items()}
+        params.update(values)
+        loss, grad, gn = _accumulate(model, Yb[idx], mb[idx], free, scale,
+                                     H0, P0, params)
+        # Chain rule to the internal coordinates:
+        grad = grad * scale_u
+        gn = gn * scale_u[:, :, None] * scale_u[:, None, :]
+        return loss, grad, gn
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        loss, grad, gn = evaluate(u, np.arange(batch))
+        lam = np.full(batch, 1e-3)
+        converged = np.zeros(batch, dtype=bool)
+        iterations = np.zeros(batch, dtype=int)
+        active = np.flatnonzero(np.isfinite(loss))
+        eye = np.eye(len(free))
+
+        for _ in range(maxiter):
+            if active.size == 0:
+                break
+            # Damped Gauss-Newton step for every active lane:
+            g = gn[active]
+            A = g + lam[active, None, None] * (g * eye + 1e-12 * eye)
+            b = grad[active]
+            ok = np.all(np.isfinite(A), axis=(1, 2))
+            step = np.zeros_like(b)
+            step[ok] = -_solve(A[ok], b[ok])
+            trial = u[active] + step
+            t_loss, t_grad, t_gn = evaluate(trial, active)
+
+            # Accept improving steps; adjust the damping lane by lane:
+            better = t_loss < loss[active]
+            small = better & (loss[active] - t_loss
+                              <= tol * (1 + loss[active]))
+            acc = active[better]
+            u[acc] = trial[better]
+            grad[acc] = t_grad[better]
+            gn[acc] = t_gn[better]
+            loss[acc] = t_loss[better]
+            lam[active] = np.where(better, lam[active] / 3, lam[active] * 2)
+            iterations[active] += 1
+            done = small | (~better & (lam[active] > 1e12))
+            converged[active[done]] = True
+            active = active[~done]
+
+    # Best start for every series:
+    per = loss.reshape(series, n_starts)
+    best = np.argmin(np.where(np.isfinite(per), per, np.inf), axis=1)
+    pick = np.arange(series) * n_starts + best
+    params = {name: _from_internal(name, u[pick, i])[0]
+              for i, name in enumerate(free)}
+    return FitResult(params, loss[pick], converged[pick], iterations[pick],
+                     per)
@@ -0,0 +1,60 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module provides the within-season ODE system of the host mortality
+% model of Section 3.2 (constant parasitism with density dependent host
+% mortality), both as a batched right-hand side for solve_batch and
+% through the explicit solution found in the text.
+"""
+
+# Import libraries:
+import numpy as np
+
+from .batch_ode import solve_batch
+from .egg_delay import SeasonResult
+
+
+# Batched right-hand side for solve_batch, Y = (L, I, P) of shape (m, 3):
+def host_mortality_rhs_batch(tau, Y, c, cd):
+    L = Y[:, 0]
+    attack = c * L * Y[:, 2]
+    return np.stack([-attack - cd * L**2, attack, np.zeros_like(L)], axis=1)
+
+
+# Batched Jacobian for solve_batch, shape (m, 3, 3):
+def host_mortality_jac_batch(tau, Y, c, cd):
+    L = Y[:, 0]
+    P = Y[:, 2]
+    J = np.zeros((Y.shape[0], 3, 3))
+    J[:, 0, 0] = -c * P - 2 * cd * L
+    J[:, 0, 2] = -c * L
+    J[:, 1, 0] = c * P
+    J[:, 1, 2] = c * L
+    return J
+
+
+def season_end_batch(H, P, c=0.1, cd=0.1, R=2.0, T=1.0, method='RK45',
+                     rtol=1e-6, atol=1e-9):
+    """
+    End-of-season L(T), I(T) for a batch of within-season systems, solved
+    numerically (see Section_3/Host_Mortality_Numerical_ODE.py).  Systems
+    whose integration fails are returned as NaN.
+    """
+    H, P, c, cd, R = [np.ascontiguousarray(a, dtype=float).ravel()
+                      for a in np.broadcast_arrays(H, P, c, cd, R)]
+    Y_0 = np.stack([R * H, np.zeros_like(H), P], axis=1)
+    res = solve_batch(host_mortality_rhs_batch, (0.0, T), Y_0, args=(c, cd),
+                      method=method, jac=host_mortality_jac_batch, rtol=rtol,
+                      atol=atol, autonomous=True)
+    Y = np.where(res.success[:, None], res.y, np.nan)
+    return SeasonResult(Y[:, 0], Y[:, 1], res.nfev, 0, 0)
+
+
+def season_explicit(tau, H, P, c=0.1, cd=0.1, R=2.0):
+    """
+    Explicit solution L(tau), I(tau) of the within-season system (see
+    Section_3/Host_Mortality_Explicit_ODE.py).  All arguments broadcast.
+    """
+    E = np.exp(c * P * tau)
+    L = (R * H) / (E + cd * R * H * (E - 1) / (c * P))
+    I = (c * P / cd) * np.log(1 + cd * R * H * (1 - 1 / E) / (c * P))
+    return L, I
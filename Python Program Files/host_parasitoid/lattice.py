@@ -0,0 +1,226 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module extends the single-patch models of Section 2 and Section 4.2
+% to a coupled map lattice.  Every generation each cell of a 2D grid first
+% applies the local host-parasitoid update, and then a fraction of the
+% hosts and of the parasitoids disperses to other cells according to a
+% dispersal kernel.  The dispersal is a convolution, which is applied by
+% FFT, either on a torus (periodic boundaries) or on a zero-padded grid so
+% that dispersers leaving the grid are lost (absorbing boundaries).  All
+% work is done in preallocated buffers, so a generation allocates no
+% arrays the size of the grid.
+"""
+
+# Import libraries:
+import numpy as np
+
+from .maps import model_params
+
+BOUNDARY = ('periodic', 'absorbing')
+
+
+# In-place local updates.  H and P are overwritten with next year's
+# populations; w and v are scratch buffers of the same shape:
+def _nicholson_bailey_local(H, P, w, v, R, c, k):
+    _host_refuge_local(H, P, w, v, R, c, k, 0.0)
+
+
+def _host_refuge_local(H, P, w, v, R, c, k, alpha):
+    np.multiply(P, -c, out=w)
+    np.exp(w, out=w)
+    w *= 1 - alpha
+    w += alpha                  # escape fraction
+    H *= R                      # hosts after reproduction
+    np.subtract(1, w, out=P)
+    P *= H
+    P *= k
+    H *= w
+
+
+def _host_mortality_local(H, P, w, v, R, c, k, z, T):
+    cd = z * c * k
+    np.multiply(P, -c * T, out=w)
+    np.expm1(w, out=v)
+    v /= w                      # (1 - E)/(c P T), NaN where P = 0
+    np.nan_to_num(v, copy=False, nan=1.0)
+    v *= cd * R * T
+    v *= H
+    v += 1                      # A
+    np.exp(w, out=w)            # E
+    H *= R
+    H *= w
+    H /= v
+    np.log(v, out=v)
+    P *= v
+    P /= z
+
+
+LOCAL_UPDATES = {
+    'nicholson_bailey': _nicholson_bailey_local,
+    'host_refuge': _host_refuge_local,
+    'host_mortality': _host_mortality_local,
+}
+
+
+def dispersal_kernel(name, sigma=1.0):
+    """
+    Named dispersal kernels, as odd-sized arrays summing to one.
+
+    ``nearest`` spreads dispersers equally over the 8 neighbouring cells,
+    ``von_neumann`` over the 4 adjacent cells, and ``gaussian`` over a
+    Gaussian of standard deviation ``sigma`` cells truncated at 4 sigma.
+    """
+    if name == 'nearest':
+        K = np.ones((3, 3))
+        K[1, 1] = 0
+    elif name == 'von_neumann':
+        K = np.array([[0.0, 1, 0], [1, 0, 1], [0, 1, 0]])
+    elif name == 'gaussian':
+        r = max(1, int(np.ceil(4 * sigma)))
+        x = np.arange(-r, r + 1)
+        g = np.exp(-0.5 * (x / sigma)**2)
+        K = np.outer(g, g)
+    else:
+        raise ValueError("unknown kernel %r; expected one of gaussian, "
+                         "nearest, von_neumann" % (name,))
+    return K / K.sum()
+
+
+def _fast_len(n):
+    # Smallest 2^a 3^b 5^c >= n:
+    best = 1 << int(np.ceil(np.log2(n)))
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            m = p35
+            while m < n:
+                m *= 2
+            best = min(best, m)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+class Lattice:
+    """
+    Coupled map lattice of a discrete host-parasitoid model.
+
+    Parameters
+    ----------
+    model : str
+        ``nicholson_bailey``, ``host_refuge`` or ``host_mortality``.
+    shape : (int, int)
+        Grid size.
+    kernel : str or array_like
+        A name accepted by ``dispersal_kernel`` or an odd-sized 2D array
+        of non-negative weights centred on the source cell (normalised
+        to sum to one).
+    mu_H, mu_P : float
+        Fractions of hosts and parasitoids that disperse each generation.
+    boundary : str
+        ``periodic`` or ``absorbing``.
+    sigma : float
+        Width of the ``gaussian`` kernel.
+    **params : float
+        Scalar model parameters, as in maps.iterate.
+
+    ``H`` and ``P`` hold the current populations and may be assigned to
+    in place (``lat.H[...] = H0``).
+    """
+
+    def __init__(self, model, shape, kernel='nearest', mu_H=0.5, mu_P=0.5,
+                 boundary='periodic', sigma=1.0, **params):
+        if model not in LOCAL_UPDATES:
+            raise ValueError('unknown model %r; expected one of %s'
+                             % (model, ', '.join(sorted(LOCAL_UPDATES))))
+        if boundary not in BOUNDARY:
+            raise ValueError('unknown boundary %r; expected one of %s'
+                             % (boundary, ', '.join(BOUNDARY)))
+        if isinstance(kernel, str):
+            K = dispersal_kernel(kernel, sigma)
+        else:
+            K = np.asarray(kernel, dtype=float)
+            if K.ndim != 2 or K.shape[0] % 2 == 0 or K.shape[1] % 2 == 0:
+                raise ValueError('kernel must be a 2D array of odd size')
+            K = K / K.sum()
+
+        self.model = model
+        self.params = model_params(model, params)
+        self.boundary = boundary
+        self._local = LOCAL_UPDATES[model]
+        n0, n1 = self.shape = tuple(shape)
+
+        # FFT grid (padded by the kernel radius for absorbing boundaries):
+        r0, r1 = K.shape[0] // 2, K.shape[1] // 2
+        if boundary == 'periodic':
+            m0, m1 = n0, n1
+        else:
+            m0, m1 = _fast_len(n0 + r0), _fast_len(n1 + r1)
+        self._fft_shape = (m0, m1)
+
+        # Transfer functions of (1 - mu) delta + mu K for both species:
+        i = (np.arange(-r0, r0 + 1) % m0)[:, None]
+        j = (np.arange(-r1, r1 + 1) % m1)[None, :]
+        self._transfer = []
+        for mu in (mu_H, mu_P):
+            image = np.zeros((m0, m1))
+            np.add.at(image, (np.broadcast_to(i, K.shape),
+                              np.broadcast_to(j, K.shape)), mu * K)
+            image[0, 0] += 1 - mu
+            self._transfer.append(np.fft.rfft2(image))
+
+        # State and work buffers:
+        self.H = np.zeros((n0, n1))
+        self.P = np.zeros((n0, n1))
+        self._w = np.empty((n0, n1))
+        self._v = np.empty((n0, n1))
+        self._spec = np.empty((m0, m1 // 2 + 1), dtype=complex)
+        if boundary == 'absorbing':
+            self._pad = np.zeros((m0, m1))
+            self._out = np.empty((m0, m1))
+
+    def _disperse(self, X, transfer):
+        # Convolve X with the kernel in place, one FFT axis at a time so
+        # that every transform writes into a preallocated buffer:
+        n0, n1 = self.shape
+        m0, m1 = self._fft_shape
+        spec = self._spec
+        if self.boundary == 'periodic':
+            src, dst = X, X
+        else:
+            self._pad[:n0, :n1] = X
+            src, dst = self._pad, self._out
+        np.fft.rfft(src, axis=1, out=spec)
+        np.fft.fft(spec, axis=0, out=spec)
+        spec *= transfer
+        np.fft.ifft(spec, axis=0, out=spec)
+        np.fft.irfft(spec, n=m1, axis=1, out=dst)
+        if dst is not X:
+            X[...] = dst[:n0, :n1]
+        # Round-off can leave tiny negative populations:
+        np.maximum(X, 0, out=X)
+
+    def step(self):
+        """Advance the lattice by one generation."""
+        with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+            self._local(self.H, self.P, self._w, self._v, **self.params)
+        self._disperse(self.H, self._transfer[0])
+        self._disperse(self.P, self._transfer[1])
+
+    def run(self, N):
+        """
+        Advance N generations.
+
+        Returns
+        -------
+        ndarray, shape (N + 1, 2)
+            Total hosts and parasitoids on the grid before the first and
+            after every generation.
+        """
+        totals = np.empty((N + 1, 2))
+        totals[0] = self.H.sum(), self.P.sum()
+        for t in range(N):
+            self.step()
+            totals[t + 1] = self.H.sum(), self.P.sum()
+        return totals
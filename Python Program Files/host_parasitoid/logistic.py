@@ -0,0 +1,79 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module generates bifurcation diagrams of the logistic map
+% x_{t+1} = r*x_t*(1 - x_t) of Section 1.3.  All values of r are iterated
+% together, a transient is discarded, and only the last iterates (or a
+% histogram of them) are kept, so memory scales with the output
+% resolution and not with the number of iterations.
+"""
+
+# Import libraries:
+import numpy as np
+
+
+def bifurcation(r, n_transient=1000, n_keep=100, x0=0.5, bins=None,
+                x_range=(0.0, 1.0), chunk_size=65536):
+    """
+    Bifurcation diagram data for the logistic map.
+
+    Parameters
+    ----------
+    r : array_like
+        Values of the growth parameter r.
+    n_transient : int
+        Number of iterations discarded before recording.
+    n_keep : int
+        Number of iterations recorded after the transient.
+    x0 : float or array_like
+        Initial condition, broadcast against ``r``.
+    bins : int, optional
+        If given, return a histogram of the recorded iterates with this
+        many bins over ``x_range`` instead of the iterates themselves.
+    chunk_size : int
+        Number of r values iterated at once; bounds the working memory.
+
+    Returns
+    -------
+    ndarray
+        Shape (len(r), n_keep) of iterates, or (len(r), bins) of counts.
+        Iterates that leave ``x_range`` are not counted in the histogram.
+    """
+    r = np.ravel(np.asarray(r, dtype=float))
+    x0 = np.broadcast_to(np.asarray(x0, dtype=float), r.shape)
+
+    # Output allocation (the only array that grows with the resolution):
+    if bins is None:
+        out = np.empty((r.size, n_keep))
+    else:
+        out = np.zeros((r.size, bins), dtype=np.int64)
+        lo, hi = x_range
+        scale = bins / (hi - lo)
+
+    with np.errstate(over='ignore', invalid='ignore'):
+        for start in range(0, r.size, chunk_size):
+            stop = min(start + chunk_size, r.size)
+            rc = r[start:stop]
+            x = x0[start:stop].copy()
+            tmp = np.empty_like(x)
+
+            # Discard the transient, updating x in place:
+            for _ in range(n_transient):
+                np.subtract(1.0, x, out=tmp)
+                x *= tmp
+                x *= rc
+
+            # Record the last n_keep iterates:
+            rows = np.arange(stop - start)
+            for j in range(n_keep):
+                np.subtract(1.0, x, out=tmp)
+                x *= tmp
+                x *= rc
+                if bins is None:
+                    out[start:stop, j] = x
+                else:
+                    idx = np.floor((x - lo) * scale)
+                    ok = (idx >= 0) & (idx < bins)
+                    # Each row receives one count per iteration, so the
+                    # fancy-indexed increment never sees duplicates:
+                    out[start + rows[ok], idx[ok].astype(np.intp)] += 1
+    return out
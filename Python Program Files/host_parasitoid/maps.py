@@ -0,0 +1,328 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module provides a batched trajectory engine for the discrete
+% host-parasitoid maps of Sections 2 and 4.  Instead of stepping one
+% scalar (H_t, P_t) pair at a time, whole arrays of initial conditions
+% and parameters are advanced together with NumPy array operations.
+"""
+
+# Import libraries:
+from collections import namedtuple
+
+import numpy as np
+
+
+# Nicholson-Bailey model (Section 2.2):
+def _nicholson_bailey(H, P, R, c, k):
+    f = np.exp(-c * P)
+    return R * H * f, k * R * H * (1 - f)
+
+
+def _nicholson_bailey_jac(H, P, R, c, k):
+    f = np.exp(-c * P)
+    return R * f, -c * R * H * f, k * R * (1 - f), c * k * R * H * f
+
+
+def _nicholson_bailey_dp(H, P, R, c, k):
+    f = np.exp(-c * P)
+    return {'R': (H * f, k * H * (1 - f)),
+            'c': (-R * H * P * f, k * R * H * P * f),
+            'k': (np.zeros_like(H * f), R * H * (1 - f))}
+
+
+# Host refuge model (Section 2.3):
+def _host_refuge(H, P, R, c, k, alpha):
+    f = np.exp(-c * P)
+    return (alpha * R * H + (1 - alpha) * R * H * f,
+            k * (1 - alpha) * R * H * (1 - f))
+
+
+def _host_refuge_jac(H, P, R, c, k, alpha):
+    f = np.exp(-c * P)
+    return (R * (alpha + (1 - alpha) * f), -c * (1 - alpha) * R * H * f,
+            k * (1 - alpha) * R * (1 - f), c * k * (1 - alpha) * R * H * f)
+
+
+def _host_refuge_dp(H, P, R, c, k, alpha):
+    f = np.exp(-c * P)
+    g = (1 - alpha) * H
+    return {'R': (H * (alpha + (1 - alpha) * f), k * g * (1 - f)),
+            'c': (-g * R * P * f, k * g * R * P * f),
+            'k': (np.zeros_like(H * f), (1 - alpha) * R * H * (1 - f)),
+            'alpha': (R * H * (1 - f), -k * R * H * (1 - f))}
+
+
+# Functional response model with m = 1 (Section 4.1.2):
+def _functional_response(H, P, R, c, k, T):
+    f = 1.0 / (1 + c * R * H * P * T)
+    return R * H * f, k * R * H * (1 - f)
+
+
+def _functional_response_jac(H, P, R, c, k, T):
+    f = 1.0 / (1 + c * R * H * P * T)
+    g = c * R**2 * T * H**2 * f**2
+    return R * f**2, -g, k * R * (1 - f**2), k * g
+
+
+def _functional_response_dp(H, P, R, c, k, T):
+    # With D = 1 + c*R*H*P*T and f = 1/D, df/dtheta = -f**2 dD/dtheta:
+    f = 1.0 / (1 + c * R * H * P * T)
+    u = R * H * f**2
+    v = u * c * H * P * T
+    return {'R': (H * f - v, k * H * (1 - f) + k * v),
+            'c': (-u * R * H * P * T, k * u * R * H * P * T),
+            'k': (np.zeros_like(f), R * H * (1 - f)),
+            'T': (-u * c * R * H * P, k * u * c * R * H * P)}
+
+
+# Host mortality semi-discrete model (Section 4.2):
+def _host_mortality(H, P, R, c, k, z, T):
+    # 1 - E is formed with expm1, which keeps the map accurate as P -> 0:
+    cd = z * c * k
+    E = np.exp(-c * P * T)
+    A = 1 + cd * R * H * -np.expm1(-c * P * T) / (c * P)
+    return R * H * E / A, (P / z) * np.log(A)
+
+
+def _host_mortality_jac(H, P, R, c, k, z, T):
+    # With q(P) = cd*R*(1 - E)/(c*P) the map reads H' = R*H*E/A and
+    # P' = (P/z)*ln(A), where A = 1 + q*H:
+    cd = z * c * k
+    E = np.exp(-c * P * T)
+    G = -np.expm1(-c * P * T)
+    q = cd * R * G / (c * P)
+    dq = cd * R * (c * T * E * P - G) / (c * P**2)
+    A = 1 + q * H
+    return (R * E / A**2,
+            -R * H * E * (c * T / A + H * dq / A**2),
+            P * q / (z * A),
+            np.log(A) / z + P * H * dq / (z * A))
+
+
+def _host_mortality_dp(H, P, R, c, k, z, T):
+    # Here q = z*k*R*(1 - E)/P; each parameter enters through E and q, and
+    # dH'/dtheta = H'*(dE/E - H*dq/A), dP'/dtheta = P*H*dq/(z*A):
+    E = np.exp(-c * P * T)
+    q = z * k * R * -np.expm1(-c * P * T) / P
+    A = 1 + q * H
+    Hn = R * H * E / A
+    dq = {'R': q / R, 'c': z * k * R * T * E, 'k': q / k, 'z': q / z,
+          'T': z * k * R * c * E}
+    dlogE = {'R': 0.0, 'c': -P * T, 'k': 0.0, 'z': 0.0, 'T': -c * P}
+    out = {}
+    for name in ('R', 'c', 'k', 'z', 'T'):
+        dH = Hn * (dlogE[name] - H * dq[name] / A)
+        if name == 'R':
+            dH = dH + Hn / R
+        out[name] = (dH, P * H * dq[name] / (z * A))
+    out['z'] = (out['z'][0], out['z'][1] - P * np.log(A) / z**2)
+    return out
+
+
+# Model registry.  Each entry holds the one-year update, its Jacobian
+# (dH'/dH, dH'/dP, dP'/dH, dP'/dP), its parameter derivatives (a dict of
+# (dH'/dtheta, dP'/dtheta) pairs), the ordered parameter names and the
+# default parameter values used in the scripts:
+Model = namedtuple('Model', ['step', 'jacobian', 'param_jacobian', 'params',
+                             'defaults'])
+
+# Pieces of a trajectory produced by iterate_chunks:
+Chunk = namedtuple('Chunk', ['t', 'X', 'state'])
+ChunkState = namedtuple('ChunkState', ['year', 'H', 'P', 'params'])
+
+MODELS = {
+    'nicholson_bailey': Model(_nicholson_bailey, _nicholson_bailey_jac,
+                              _nicholson_bailey_dp, ('R', 'c', 'k'),
+                              {'R': 2.0, 'c': 0.1, 'k': 1.0}),
+    'host_refuge': Model(_host_refuge, _host_refuge_jac, _host_refuge_dp,
+                         ('R', 'c', 'k', 'alpha'),
+                         {'R': 2.0, 'c': 0.1, 'k': 1.0}),
+    'functional_response': Model(_functional_response,
+                                 _functional_response_jac,
+                                 _functional_response_dp,
+                                 ('R', 'c', 'k', 'T'),
+                                 {'R': 2.0, 'c': 0.1, 'k': 1.0, 'T': 1.0}),
+    'host_mortality': Model(_host_mortality, _host_mortality_jac,
+                            _host_mortality_dp, ('R', 'c', 'k', 'z', 'T'),
+                            {'R': 2.0, 'c': 0.1, 'k': 1.0, 'T': 1.0}),
+}
+
+
+def get_model(model):
+    """Return the registry entry for a model name."""
+    try:
+        return MODELS[model]
+    except KeyError:
+        raise ValueError('unknown model %r; expected one of %s'
+                         % (model, ', '.join(sorted(MODELS)))) from None
+
+
+def model_params(model, params):
+    """Fill in defaults and check the parameter names for a model."""
+    spec = get_model(model)
+    unknown = set(params) - set(spec.params)
+    if unknown:
+        raise ValueError('unknown parameter(s) for %s: %s'
+                         % (model, ', '.join(sorted(unknown))))
+    values = dict(spec.defaults)
+    values.update(params)
+    missing = [name for name in spec.params if name not in values]
+    if missing:
+        raise ValueError('missing parameter(s) for %s: %s'
+                         % (model, ', '.join(missing)))
+    return {name: values[name] for name in spec.params}
+
+
+def broadcast_batch(H0, P0, params):
+    """
+    Broadcast initial conditions and parameters to a common flat batch.
+
+    Returns the raveled H0 and P0 arrays and a dict of raveled parameter
+    arrays, all of length ``batch``.
+    """
+    names = list(params)
+    arrays = np.broadcast_arrays(np.asarray(H0, dtype=float),
+                                 np.asarray(P0, dtype=float),
+                                 *[np.asarray(params[name], dtype=float)
+                                   for name in names])
+    flat = [np.ascontiguousarray(a).ravel() for a in arrays]
+    return flat[0], flat[1], dict(zip(names, flat[2:]))
+
+
+def step(model, H, P, **params):
+    """Apply one year of a model to arrays of hosts and parasitoids."""
+    spec = get_model(model)
+    p = model_params(model, params)
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        return spec.step(np.asarray(H, dtype=float),
+                         np.asarray(P, dtype=float), **p)
+
+
+def jacobian(model, H, P, **params):
+    """
+    Jacobian of one year of a model at arrays of states.
+
+    Returns the entries (dH'/dH, dH'/dP, dP'/dH, dP'/dP) as arrays.
+    """
+    spec = get_model(model)
+    p = model_params(model, params)
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        return spec.jacobian(np.asarray(H, dtype=float),
+                             np.asarray(P, dtype=float), **p)
+
+
+def param_jacobian(model, H, P, **params):
+    """
+    Parameter derivatives of one year of a model at arrays of states.
+
+    Returns a dict mapping each parameter name to (dH'/dtheta, dP'/dtheta).
+    """
+    spec = get_model(model)
+    p = model_params(model, params)
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        return spec.param_jacobian(np.asarray(H, dtype=float),
+                                   np.asarray(P, dtype=float), **p)
+
+
+def iterate(model, H0, P0, N, **params):
+    """
+    Iterate a discrete host-parasitoid map for a batch of trajectories.
+
+    Parameters
+    ----------
+    model : str
+        One of ``nicholson_bailey``, ``host_refuge``,
+        ``functional_response`` or ``host_mortality``.
+    H0, P0 : array_like
+        Initial host and parasitoid populations.
+    N : int
+        Number of years.
+    **params : array_like
+        Model parameters (R, c, k, alpha, z, T).  Unspecified parameters
+        take the values used in the chapter scripts.
+
+    ``H0``, ``P0`` and the parameters are broadcast against each other and
+    raveled, so a sweep over a parameter grid is a single call.
+
+    Returns
+    -------
+    X : ndarray, shape (batch, N + 1, 2)
+        ``X[:, t, 0]`` is H_t and ``X[:, t, 1]`` is P_t.
+    """
+    spec = get_model(model)
+    H, P, p = broadcast_batch(H0, P0, model_params(model, params))
+
+    # Trajectory initialization:
+    X = np.empty((H.size, N + 1, 2))
+    X[:, 0, 0] = H
+    X[:, 0, 1] = P
+
+    # Function iteration, one array operation per year for the whole batch:
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for t in range(N):
+            H, P = spec.step(H, P, **p)
+            X[:, t + 1, 0] = H
+            X[:, t + 1, 1] = P
+    return X
+
+
+def iterate_chunks(model, H0, P0, N, chunk_size=4096, stride=1, state=None,
+                   **params):
+    """
+    Iterate a map like ``iterate``, yielding the trajectory in chunks.
+
+    Only one chunk is held at a time, so a run of any length needs
+    memory proportional to ``batch * chunk_size`` and its consumer can
+    start on the first years before the last ones are computed.
+
+    Parameters
+    ----------
+    model, H0, P0, N, **params
+        As in ``iterate``; years 0..N are produced.
+    chunk_size : int
+        Number of recorded years per chunk.
+    stride : int
+        Record only the years that are multiples of ``stride``.
+    state : ChunkState, optional
+        The ``state`` of a chunk from an earlier run.  The run resumes
+        after that chunk with the populations and the (raveled)
+        parameters stored in it, so ``H0``, ``P0`` and ``**params`` are
+        then ignored.  Called with the same ``N``, ``chunk_size`` and
+        ``stride``, it yields exactly the chunks that the uninterrupted
+        run would have yielded after it.
+
+    Yields
+    ------
+    Chunk
+        ``t``, the recorded years; ``X`` of shape (batch, len(t), 2) with
+        ``X[:, i]`` = (H, P) in year ``t[i]``; and ``state``, the year,
+        populations and per-lane parameters at the end of the chunk.
+    """
+    spec = get_model(model)
+    if state is None:
+        H, P, p = broadcast_batch(H0, P0, model_params(model, params))
+        year = first = 0
+    else:
+        H, P, p = state.H, state.P, state.params
+        year = state.year
+        first = year + 1
+
+    X = np.empty((H.size, chunk_size, 2))
+    t = np.empty(chunk_size, dtype=np.int64)
+    n = 0
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        while True:
+            if year >= first and year % stride == 0:
+                X[:, n, 0] = H
+                X[:, n, 1] = P
+                t[n] = year
+                n += 1
+            if n == chunk_size or (year >= N and n):
+                yield Chunk(t[:n], X[:, :n], ChunkState(year, H, P, p))
+                X = np.empty((H.size, chunk_size, 2))
+                t = np.empty(chunk_size, dtype=np.int64)
+                n = 0
+            if year >= N:
+                return
+            H, P = spec.step(H, P, **p)
+            year += 1
@@ -0,0 +1,223 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module iterates the discrete models while keeping only running
+% summaries of every trajectory instead of the trajectories themselves.
+% Each year the current (H_t, P_t) of all lanes is handed to a set of
+% reducers, which update per-lane statistics in place:
+%   Moments        count, mean and variance (Welford's update),
+%   Extrema        smallest and largest value,
+%   LastK          the last k years,
+%   FirstCrossing  first year a threshold is crossed,
+%   Histogram      counts of the values in fixed bins.
+% Memory is therefore proportional to the batch size and not to the
+% number of years.  Statistics may be stored as float32 to halve it again
+% (the yearly update itself is always done in double precision, but
+% populations beyond the float32 range are stored as inf).
+"""
+
+# Import libraries:
+from collections import namedtuple
+
+import numpy as np
+
+from .maps import broadcast_batch, get_model, model_params
+
+MomentsResult = namedtuple('MomentsResult', ['count', 'mean', 'var'])
+ExtremaResult = namedtuple('ExtremaResult', ['min', 'max'])
+HistogramResult = namedtuple('HistogramResult', ['edges', 'counts'])
+
+
+class Moments:
+    """
+    Running count, mean and variance of every lane (NaN and infinite
+    values are not counted).  The result arrays have shape (batch, 2),
+    column 0 for hosts and column 1 for parasitoids.
+    """
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+
+    def begin(self, batch):
+        self.count = np.zeros((batch, 2), dtype=np.int64)
+        self.mean = np.zeros((batch, 2), dtype=self.dtype)
+        self.m2 = np.zeros((batch, 2), dtype=self.dtype)
+        self._delta = np.empty((batch, 2))
+        self._work = np.empty((batch, 2))
+
+    def update(self, t, X):
+        ok = np.isfinite(X)
+        finite = ok.all()
+        self.count += ok
+        delta, work = self._delta, self._work
+        np.subtract(X, self.mean, out=delta)
+        if not finite:
+            delta[~ok] = 0
+        np.maximum(self.count, 1, out=work)
+        np.divide(delta, work, out=work)
+        self.mean += work
+        # Welford: M2 += (x - old mean) * (x - new mean):
+        np.subtract(X, self.mean, out=work)
+        work *= delta
+        if not finite:
+            work[~ok] = 0
+        self.m2 += work
+
+    def result(self):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            var = np.where(self.count > 1, self.m2 / (self.count - 1),
+                           np.nan).astype(self.dtype)
+        mean = np.where(self.count > 0, self.mean, np.nan).astype(self.dtype)
+        return MomentsResult(self.count, mean, var)
+
+
+class Extrema:
+    """Smallest and largest value of every lane (NaN is ignored)."""
+
+    def __init__(self, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+
+    def begin(self, batch):
+        self.min = np.full((batch, 2), np.inf, dtype=self.dtype)
+        self.max = np.full((batch, 2), -np.inf, dtype=self.dtype)
+
+    def update(self, t, X):
+        np.fmin(self.min, X, out=self.min, casting='same_kind')
+        np.fmax(self.max, X, out=self.max, casting='same_kind')
+
+    def result(self):
+        return ExtremaResult(self.min, self.max)
+
+
+class LastK:
+    """
+    The last ``k`` recorded years of every lane, as an array of shape
+    (batch, k, 2) in chronological order (NaN before the first year if
+    fewer than k years were recorded).
+    """
+
+    def __init__(self, k, dtype=np.float64):
+        self.k = k
+        self.dtype = np.dtype(dtype)
+
+    def begin(self, batch):
+        # Ring buffer with years first, so that every write is contiguous:
+        self.buffer = np.full((self.k, batch, 2), np.nan, dtype=self.dtype)
+        self.n = 0
+
+    def update(self, t, X):
+        self.buffer[self.n % self.k] = X
+        self.n += 1
+
+    def result(self):
+        return np.roll(self.buffer, -(self.n % self.k),
+                       axis=0).transpose(1, 0, 2)
+
+
+class FirstCrossing:
+    """
+    First year in which each population drops below (``direction`` =
+    'below') or rises above ('above') ``threshold``; -1 if it never does.
+    The result has shape (batch, 2).
+    """
+
+    def __init__(self, threshold, direction='below'):
+        if direction not in ('below', 'above'):
+            raise ValueError("unknown direction %r; expected above or below"
+                             % (direction,))
+        self.threshold = threshold
+        self.direction = direction
+
+    def begin(self, batch):
+        self.time = np.full((batch, 2), -1, dtype=np.int64)
+
+    def update(self, t, X):
+        if self.direction == 'below':
+            hit = X < self.threshold
+        else:
+            hit = X > self.threshold
+        self.time[hit & (self.time < 0)] = t
+
+    def result(self):
+        return self.time
+
+
+class Histogram:
+    """
+    Per-lane histogram of the recorded values in ``bins`` equal bins over
+    ``range`` (equal in log scale if ``log``).  Values outside the range
+    are not counted.  The counts have shape (batch, 2, bins).
+    """
+
+    def __init__(self, bins, range, log=False):
+        lo, hi = range
+        if log:
+            self.edges = np.geomspace(lo, hi, bins + 1)
+            lo, hi = np.log(lo), np.log(hi)
+        else:
+            self.edges = np.linspace(lo, hi, bins + 1)
+        self.bins = bins
+        self.log = log
+        self._lo = lo
+        self._scale = bins / (hi - lo)
+
+    def begin(self, batch):
+        self.counts = np.zeros((batch, 2, self.bins), dtype=np.uint32)
+
+    def update(self, t, X):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            v = np.log(X) if self.log else X
+            v = (v - self._lo) * self._scale
+        # The upper edge belongs to the last bin, as in np.histogram:
+        v[v == self.bins] = self.bins - 1
+        ok = (v >= 0) & (v < self.bins)
+        # Every (lane, species) adds at most one count, so the indices are
+        # distinct and a plain fancy-indexed increment is enough:
+        index = np.flatnonzero(ok) * self.bins + v[ok].astype(np.int64)
+        self.counts.reshape(-1)[index] += 1
+
+    def result(self):
+        return HistogramResult(self.edges, self.counts)
+
+
+def summarize(model, H0, P0, N, reducers, start=0, **params):
+    """
+    Iterate a map for a batch of trajectories, keeping only summaries.
+
+    Parameters
+    ----------
+    model : str
+        Model name, as in maps.iterate.
+    H0, P0 : array_like
+        Initial host and parasitoid populations.
+    N : int
+        Number of years.
+    reducers : dict
+        Name -> reducer (Moments, Extrema, LastK, FirstCrossing,
+        Histogram).  Reducer objects are reset at the start of the run.
+    start : int
+        First year passed to the reducers, to leave out a transient.
+    **params : array_like
+        Model parameters, broadcast and raveled with ``H0`` and ``P0`` as
+        in maps.iterate.
+
+    Returns
+    -------
+    dict
+        Name -> result of each reducer over the years ``start``..``N``.
+    """
+    spec = get_model(model)
+    H, P, p = broadcast_batch(H0, P0, model_params(model, params))
+    X = np.empty((H.size, 2))
+    for reducer in reducers.values():
+        reducer.begin(H.size)
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for t in range(N + 1):
+            if t >= start:
+                X[:, 0] = H
+                X[:, 1] = P
+                for reducer in reducers.values():
+                    reducer.update(t, X)
+            if t < N:
+                H, P = spec.step(H, P, **p)
+    return {name: reducer.result() for name, reducer in reducers.items()}
@@ -0,0 +1,127 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module maps the long-run regimes of the discrete models over a
+% plane of two parameters, e.g. (R, alpha) for the host refuge model or
+% (R, z) for the host mortality model, by simulating the map from the
+% initial populations of the trajectory scripts.  The plane is covered by
+% a coarse grid of cells, and only the cells whose four corners end in
+% different regimes are split into four, quadtree-style, down to a
+% finest level.  Corner results are stored on the finest lattice and
+% reused by every cell that shares them, so the regime boundaries are
+% resolved at the finest level at a fraction of the cost of simulating
+% the whole fine grid.
+"""
+
+# Import libraries:
+from collections import namedtuple
+
+import numpy as np
+
+from .settling import (CYCLE, DIVERGED, EXTINCT, FIXED_POINT, RUNNING,
+                     settle)
+
+# Regime names for the settle outcome codes:
+LABELS = {
+    RUNNING: 'Bounded Oscillations',
+    FIXED_POINT: 'Stable Equilibrium',
+    CYCLE: 'Periodic Cycle',
+    EXTINCT: 'Extinction',
+    DIVERGED: 'Unbounded Solutions',
+}
+
+RegimeMap = namedtuple('RegimeMap', ['x', 'y', 'code', 'simulations'])
+
+
+def regime_map(model, x_name, x_range, y_name, y_range, N, n0=16, depth=5,
+               H0=5.0, P0=8.0, **kwargs):
+    """
+    Simulated regime map over a parameter plane with quadtree refinement.
+
+    Parameters
+    ----------
+    model : str
+        Model name, as in maps.iterate.
+    x_name, y_name : str
+        The two model parameters spanning the plane, e.g. 'R' and 'alpha'.
+    x_range, y_range : (float, float)
+        Extent of the plane.
+    N : int
+        Maximum number of years simulated per point.
+    n0 : int
+        Number of cells along each axis of the initial grid.
+    depth : int
+        Number of times a cell may be split; the finest lattice has
+        ``n0 * 2**depth + 1`` points along each axis.
+    H0, P0 : float
+        Initial populations (those of the trajectory scripts by default).
+    **kwargs
+        Remaining scalar model parameters and settle options.
+
+    Features smaller than an initial cell whose corners all agree are not
+    seen, so ``n0`` should resolve the coarsest structure of the map.
+
+    Returns
+    -------
+    RegimeMap
+        The axes of the finest lattice, the regime code at every lattice
+        point (``code[i, j]`` is at (x[j], y[i]); see ``LABELS``), and the
+        number of points actually simulated.
+    """
+    n = n0 << depth
+    x = np.linspace(*x_range, n + 1)
+    y = np.linspace(*y_range, n + 1)
+
+    # Simulated codes on the finest lattice (-1 where not simulated):
+    known = np.full((n + 1, n + 1), -1, dtype=np.int8)
+    simulations = 0
+
+    def simulate(i, j):
+        # Simulate the lattice points (i, j) that are not yet known:
+        nonlocal simulations
+        flat = np.unique(np.ravel_multi_index((i, j), known.shape))
+        flat = flat[known.flat[flat] < 0]
+        if flat.size:
+            i, j = np.unravel_index(flat, known.shape)
+            params = dict(kwargs)
+            params[x_name] = x[j]
+            params[y_name] = y[i]
+            known.flat[flat] = settle(model, H0, P0, N, **params).status
+            simulations += flat.size
+
+    # Initial grid of cells, given by their lower-left lattice point:
+    size = 1 << depth
+    ci, cj = [a.ravel() for a in np.meshgrid(np.arange(0, n, size),
+                                             np.arange(0, n, size),
+                                             indexing='ij')]
+    corners = np.arange(0, n + 1, size)
+    simulate(*[a.ravel() for a in np.meshgrid(corners, corners,
+                                              indexing='ij')])
+    leaves = []
+
+    while ci.size:
+        # Cells whose corners agree are final:
+        c00 = known[ci, cj]
+        same = ((c00 == known[ci + size, cj]) & (c00 == known[ci, cj + size])
+                & (c00 == known[ci + size, cj + size]))
+        leaves.append((ci[same], cj[same], size, c00[same]))
+        ci, cj = ci[~same], cj[~same]
+        if size == 1:
+            break
+
+        # Split the others, simulating the edge midpoints and centres:
+        half = size // 2
+        simulate(np.concatenate([ci + half, ci, ci + half, ci + size,
+                                 ci + half]),
+                 np.concatenate([cj, cj + half, cj + half, cj + half,
+                                 cj + size]))
+        ci = np.concatenate([ci, ci + half, ci, ci + half])
+        cj = np.concatenate([cj, cj, cj + half, cj + half])
+        size = half
+
+    # Fill the interior of uniform cells with their corner code:
+    code = known.copy()
+    for li, lj, s, c in leaves:
+        for a, b, v in zip(li, lj, c):
+            block = code[a:a + s + 1, b:b + s + 1]
+            block[block < 0] = v
+    return RegimeMap(x, y, code, simulations)
@@ -0,0 +1,130 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module renders the chapter figures without a display.  A Section_*
+% script is run with the Agg backend and with plt.show turned into a
+% no-op, and every figure it leaves open is written to PNG and/or PDF.
+% Before saving, lines with more points than the figure can resolve are
+% decimated: the series is cut into bins and only the minimum and maximum
+% of each bin are kept, so peaks and troughs survive while the number of
+% points drawn (and the time spent drawing them) stays bounded.
+"""
+
+# Import libraries:
+import os
+import runpy
+
+import numpy as np
+
+FORMATS = ('png', 'pdf')
+
+
+def _pyplot():
+    # Import pyplot on the Agg backend (only when rendering):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def decimate(x, y, max_points=4000):
+    """
+    Min/max-preserving downsampling of a series with monotonic x.
+
+    The points are split into ``max_points // 2`` bins of consecutive
+    indices, and the smallest and largest y of each bin are kept in their
+    original order, together with the first and last point.  The first
+    point of every run of NaN or infinite values is kept as well, so a
+    line that such values break into segments stays broken at the same
+    places.  Series with at most ``max_points`` points are returned
+    unchanged.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n = y.size
+    if n <= max_points:
+        return x, y
+    bins = max(1, max_points // 2)
+    size = -(-n // bins)
+    pad = bins * size - n
+
+    # Bin-wise argmin and argmax (non-finite values are never selected
+    # unless a whole bin is non-finite):
+    finite = np.isfinite(y)
+    lo = np.concatenate([np.where(finite, y, np.inf),
+                         np.full(pad, np.inf)]).reshape(bins, size)
+    hi = np.concatenate([np.where(finite, y, -np.inf),
+                         np.full(pad, -np.inf)]).reshape(bins, size)
+    start = np.arange(bins) * size
+
+    # One point at the start of every gap keeps the line broken there:
+    gaps = np.flatnonzero(~finite & np.concatenate([[True], finite[:-1]]))
+    keep = np.concatenate([[0, n - 1], start + lo.argmin(axis=1),
+                           start + hi.argmax(axis=1), gaps])
+    keep = np.unique(np.minimum(keep, n - 1))
+    return x[keep], y[keep]
+
+
+def decimate_figure(fig, max_points=4000):
+    """
+    Decimate, in place, every line of a figure that has more than
+    ``max_points`` points and a monotonic x.  Returns the number of lines
+    changed.
+    """
+    changed = 0
+    for ax in fig.axes:
+        for line in ax.get_lines():
+            x = np.asarray(line.get_xdata(), dtype=float)
+            y = np.asarray(line.get_ydata(), dtype=float)
+            if y.size <= max_points or x.size != y.size:
+                continue
+            dx = np.diff(x)
+            if not (np.all(dx >= 0) or np.all(dx <= 0)):
+                continue
+            line.set_data(*decimate(x, y, max_points))
+            changed += 1
+    return changed
+
+
+def render_script(path, out_dir, formats=FORMATS, max_points=4000, dpi=150):
+    """
+    Run a figure script headless and save the figures it creates.
+
+    Parameters
+    ----------
+    path : str
+        Path of a Section_* script.
+    out_dir : str
+        Output directory; figure n of ``Name.py`` is written as
+        ``Name_fig<n>.<format>``.
+    formats : sequence of str
+        File formats passed to savefig.
+    max_points : int
+        Lines longer than this are decimated before saving.
+    dpi : int
+        Resolution of raster formats.
+
+    Returns
+    -------
+    list of str
+        The files written.
+    """
+    plt = _pyplot()
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    plt.close('all')
+    show = plt.show
+    plt.show = lambda *args, **kwargs: None
+    try:
+        runpy.run_path(path, run_name='__main__')
+        written = []
+        for num in plt.get_fignums():
+            fig = plt.figure(num)
+            decimate_figure(fig, max_points)
+            for fmt in formats:
+                out = os.path.join(out_dir, '%s_fig%d.%s' % (stem, num, fmt))
+                fig.savefig(out, dpi=dpi)
+                written.append(out)
+    finally:
+        plt.show = show
+        plt.close('all')
+    return written
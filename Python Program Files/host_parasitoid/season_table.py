@@ -0,0 +1,275 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module tabulates the year-to-year map of the egg maturation delay
+% model, (H_t, P_t) -> (L(T), I(T)), on an adaptive (H, P) grid.  The map
+% depends only on the state and the fixed parameters, so once the table is
+% built a trajectory costs one interpolation per year instead of one ODE
+% solve.  The interpolation error is checked against direct solves at the
+% centre of every grid cell while the table is refined, and tables are
+% stored on disk keyed by their parameters and by the version of the code
+% that builds them (this module, egg_delay and batch_ode; see
+% cache.code_version), so a change to that code never serves a stale
+% table.
+"""
+
+# Import libraries:
+import hashlib
+import json
+import os
+
+import numpy as np
+from scipy.interpolate import RectBivariateSpline
+
+from .cache import code_version
+from .egg_delay import season_end_batch
+
+# Smallest value kept before taking logarithms:
+_TINY = 1e-300
+
+# Build settings (model parameters, grid extent, tolerances and solver).
+# The default extent covers the neighbourhood of the coexistence state, not
+# the outbreak of Section_4/Egg_Delay_Trajectory.py, whose hosts grow to
+# about 1e15 within 50 years; past the table every year is a direct solve,
+# so that run is slower through iterate_table than egg_delay.trajectory.
+# The refinement does not scale to such ranges (the band of (H, P) where
+# the hosts are wiped out is diagonal in log coordinates and is resolved
+# by whole rows and columns), so the table is meant for long or batched
+# runs that stay within a few decades of equilibrium:
+DEFAULTS = {
+    'H_range': (1e-1, 1e3), 'P_range': (1e-1, 1e3),
+    'beta': 0.5, 'c': 0.1, 'cr': 1.0, 'R': 2.0, 'T': 1.0,
+    'tol': 1e-4, 'floor': 1e-6, 'n0': 17, 'max_size': 2049,
+    'method': 'Rosenbrock', 'rtol': 1e-8, 'atol': 1e-10,
+}
+
+
+def table_settings(**kwargs):
+    """Complete and normalise a set of build settings."""
+    unknown = set(kwargs) - set(DEFAULTS)
+    if unknown:
+        raise ValueError('unknown setting(s): %s' % ', '.join(sorted(unknown)))
+    settings = dict(DEFAULTS)
+    settings.update(kwargs)
+    for name in ('H_range', 'P_range'):
+        settings[name] = [float(v) for v in settings[name]]
+    return settings
+
+
+def table_key(settings):
+    """
+    Hash identifying a season table by its build settings and the code
+    that builds it.
+    """
+    blob = json.dumps({'settings': settings,
+                       'code': code_version('season_table')}, sort_keys=True)
+    return hashlib.sha256(blob.encode()).hexdigest()[:16]
+
+
+def _split(axis, split):
+    # Insert the midpoints of the intervals flagged in ``split``.  Returns
+    # the new axis, a mask of the nodes that were already present, and for
+    # every new interval the index of the unchanged old interval (or -1).
+    mids = 0.5 * (axis[1:] + axis[:-1])[split]
+    new_axis = np.sort(np.concatenate([axis, mids]))
+    old_nodes = np.isin(new_axis, axis)
+    old_intervals = np.repeat(np.where(split, -1, np.arange(split.size)),
+                              np.where(split, 2, 1))
+    return new_axis, old_nodes, old_intervals
+
+
+def _centres(axis):
+    return 0.5 * (axis[1:] + axis[:-1])
+
+
+class SeasonTable:
+    """
+    Interpolation table of the egg maturation delay season map.
+
+    The table stores log L(T) and log I(T) on a grid that is uniform in
+    (log H, log P) before refinement and is evaluated by bicubic spline
+    interpolation in those coordinates.  ``max_error`` is the largest
+    error of the interpolant found at the cell centres of the final grid,
+    relative to the direct solve there (or to the ``floor`` setting where
+    the solved value is smaller).  States outside the table are solved
+    directly, one ODE solve per state and year, so a trajectory only gains
+    from the table while it stays inside H_range and P_range.
+    """
+
+    def __init__(self, logH, logP, logL, logI, settings, max_error):
+        self.logH = logH
+        self.logP = logP
+        self.logL = logL
+        self.logI = logI
+        self.settings = settings
+        self.max_error = max_error
+        self._sL = RectBivariateSpline(logH, logP, logL)
+        self._sI = RectBivariateSpline(logH, logP, logI)
+
+    @property
+    def shape(self):
+        return self.logL.shape
+
+    @classmethod
+    def build(cls, **kwargs):
+        """
+        Build a table from the settings in ``DEFAULTS`` (overridden by
+        ``kwargs``).  Every axis interval that borders a cell whose centre
+        error exceeds ``tol`` is halved until all cells pass, or until an
+        axis has ``max_size`` points; ``max_error`` then reports the bound
+        actually reached.  A failed direct solve, or an error that is still
+        NaN after refinement, raises RuntimeError.
+        """
+        s = table_settings(**kwargs)
+
+        def solve(lh, lp):
+            season = season_end_batch(np.exp(lh), np.exp(lp), s['beta'],
+                                      s['c'], s['cr'], s['R'], s['T'],
+                                      s['method'], s['rtol'], s['atol'])
+            failed = ~(np.isfinite(season.L) & np.isfinite(season.I))
+            if failed.any():
+                i = np.flatnonzero(failed)[0]
+                raise RuntimeError(
+                    'season integration failed at %d table point(s), e.g. '
+                    'H = %g, P = %g' % (failed.sum(), np.exp(lh.flat[i]),
+                                        np.exp(lp.flat[i])))
+            return (np.log(np.maximum(season.L, _TINY)).reshape(lh.shape),
+                    np.log(np.maximum(season.I, _TINY)).reshape(lh.shape))
+
+        def centre_error(dL, dI):
+            # Interpolation error at the cell centres:
+            err = []
+            for Z, d in ((logL, dL), (logI, dI)):
+                z = RectBivariateSpline(logH, logP, Z)(_centres(logH),
+                                                        _centres(logP))
+                z = np.minimum(z, Z.max() + 1)
+                err.append(np.abs(np.exp(z) - np.exp(d))
+                           / np.maximum(np.exp(d), s['floor']))
+            return np.maximum(*err)
+
+        # Direct solves on the initial grid nodes and cell centres:
+        logH = np.linspace(*np.log(s['H_range']), s['n0'])
+        logP = np.linspace(*np.log(s['P_range']), s['n0'])
+        logL, logI = solve(*np.meshgrid(logH, logP, indexing='ij'))
+        cL, cI = solve(*np.meshgrid(_centres(logH), _centres(logP),
+                                    indexing='ij'))
+        err = centre_error(cL, cI)
+
+        # NaN errors (e.g. from an overflowing spline) count as failing:
+        while not np.all(err <= s['tol']):
+            # Split the axis intervals next to failing cells:
+            bad = ~(err <= s['tol'])
+            rows = bad.any(axis=1) & (logH.size < s['max_size'])
+            cols = bad.any(axis=0) & (logP.size < s['max_size'])
+            if not (rows.any() or cols.any()):
+                break
+            logH, old_hn, old_hi = _split(logH, rows)
+            logP, old_pn, old_pi = _split(logP, cols)
+
+            # Only nodes on a new grid line need a direct solve:
+            gh, gp = np.meshgrid(logH, logP, indexing='ij')
+            need = ~(old_hn[:, None] & old_pn[None, :])
+            new_L = np.empty(gh.shape)
+            new_I = np.empty(gh.shape)
+            new_L[np.ix_(old_hn, old_pn)] = logL
+            new_I[np.ix_(old_hn, old_pn)] = logI
+            new_L[need], new_I[need] = solve(gh[need], gp[need])
+            logL, logI = new_L, new_I
+
+            # Likewise only the centres of split cells are solved again; the
+            # spline itself is global, so the error is re-checked everywhere:
+            ch, cp = np.meshgrid(_centres(logH), _centres(logP),
+                                 indexing='ij')
+            kh = old_hi >= 0
+            kp = old_pi >= 0
+            need = ~(kh[:, None] & kp[None, :])
+            new_cL = np.empty(ch.shape)
+            new_cI = np.empty(ch.shape)
+            new_cL[np.ix_(kh, kp)] = cL[np.ix_(old_hi[kh], old_pi[kp])]
+            new_cI[np.ix_(kh, kp)] = cI[np.ix_(old_hi[kh], old_pi[kp])]
+            new_cL[need], new_cI[need] = solve(ch[need], cp[need])
+            cL, cI = new_cL, new_cI
+            err = centre_error(cL, cI)
+
+        if np.isnan(err).any():
+            raise RuntimeError('season table error is NaN at %d cell(s) '
+                               'after refinement' % np.isnan(err).sum())
+        return cls(logH, logP, logL, logI, s, float(err.max()))
+
+    def __call__(self, H, P):
+        """Evaluate (L(T), I(T)) at arrays of H and P."""
+        H, P = np.broadcast_arrays(np.asarray(H, dtype=float),
+                                   np.asarray(P, dtype=float))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = np.log(H)
+            y = np.log(P)
+        inside = ((x >= self.logH[0]) & (x <= self.logH[-1])
+                  & (y >= self.logP[0]) & (y <= self.logP[-1]))
+        L = np.empty(H.shape)
+        I = np.empty(H.shape)
+        L[inside] = np.exp(self._sL.ev(x[inside], y[inside]))
+        I[inside] = np.exp(self._sI.ev(x[inside], y[inside]))
+
+        # States outside the table are solved directly:
+        outside = ~inside
+        if outside.any():
+            s = self.settings
+            season = season_end_batch(H[outside], P[outside], s['beta'],
+                                      s['c'], s['cr'], s['R'], s['T'],
+                                      s['method'], s['rtol'], s['atol'])
+            L[outside] = season.L
+            I[outside] = season.I
+        return L, I
+
+    def save(self, directory):
+        """Write the table to ``directory`` and return the file path."""
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory,
+                            'egg_delay_%s.npz' % table_key(self.settings))
+        np.savez(path, logH=self.logH, logP=self.logP, logL=self.logL,
+                 logI=self.logI, max_error=self.max_error,
+                 settings=json.dumps(self.settings, sort_keys=True))
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Read a table written by ``save``."""
+        with np.load(path) as data:
+            return cls(data['logH'], data['logP'], data['logL'],
+                       data['logI'], json.loads(str(data['settings'])),
+                       float(data['max_error']))
+
+    @classmethod
+    def cached(cls, directory, **kwargs):
+        """
+        Load the table for these build settings from ``directory``, or
+        build and save it if it does not exist yet.
+        """
+        key = table_key(table_settings(**kwargs))
+        path = os.path.join(directory, 'egg_delay_%s.npz' % key)
+        if os.path.exists(path):
+            return cls.load(path)
+        table = cls.build(**kwargs)
+        table.save(directory)
+        return table
+
+
+def iterate_table(table, H0, P0, N, k=1.0):
+    """
+    Iterate the egg maturation delay model using a SeasonTable.
+
+    Returns X of shape (batch, N + 1, 2), as maps.iterate does.  Years
+    that leave the table cost a direct solve each, so runs that escape it
+    (such as the default Egg_Delay_Trajectory outbreak) are no faster than
+    egg_delay.trajectory.
+    """
+    H, P, k = [np.ascontiguousarray(a, dtype=float).ravel()
+               for a in np.broadcast_arrays(H0, P0, k)]
+    X = np.empty((H.size, N + 1, 2))
+    X[:, 0, 0] = H
+    X[:, 0, 1] = P
+    for t in range(N):
+        L, I = table(H, P)
+        H, P = L, k * I
+        X[:, t + 1, 0] = H
+        X[:, t + 1, 1] = P
+    return X
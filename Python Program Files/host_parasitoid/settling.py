@@ -0,0 +1,166 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module iterates a batch of trajectories only until each one has
+% settled.  Convergence to a fixed point or to a period-n cycle is detected
+% within a tolerance by Brent's cycle-finding scheme: every lane keeps a
+% saved "tortoise" state that is refreshed at power-of-two intervals, and
+% the lane retires as soon as the current state returns to it.  Retired
+% lanes are dropped from the working arrays, so a sweep in which most
+% lanes converge early costs far less than N years for every lane.
+% Lanes whose populations overflow or collapse below an extinction
+% threshold are retired in the same way.
+"""
+
+# Import libraries:
+from collections import namedtuple
+
+import numpy as np
+
+from .maps import broadcast_batch, get_model, model_params
+
+# Outcome codes:
+RUNNING = 0       # not settled within N years
+FIXED_POINT = 1   # converged to a fixed point
+CYCLE = 2         # converged to a cycle of period > 1
+EXTINCT = 3       # host or parasitoid fell below the extinction threshold
+DIVERGED = 4      # a population exceeded the overflow threshold or is NaN
+
+# A detected cycle whose points all lie within this many tolerances of
+# each other is a slowly spiralling approach to a fixed point:
+_SPREAD = 100
+
+SettleResult = namedtuple('SettleResult', ['H', 'P', 'status', 'period',
+                                           'step'])
+
+
+def _close(H, P, H_ref, P_ref, rtol, atol):
+    return ((np.abs(H - H_ref) <= atol + rtol * np.abs(H_ref))
+            & (np.abs(P - P_ref) <= atol + rtol * np.abs(P_ref)))
+
+
+def _min_period(spec, H, P, p, lam, rtol, atol):
+    # Smallest j <= lam with f^j(x) close to x, for lanes that returned to
+    # their tortoise state after lam steps (j = lam if none is found).
+    # Orbits that never leave a small neighbourhood of x count as period 1.
+    period = lam.copy()
+    found = np.zeros(H.shape, dtype=bool)
+    small = np.ones(H.shape, dtype=bool)
+    Hj, Pj = H, P
+    for j in range(1, int(lam.max())):
+        Hj, Pj = spec.step(Hj, Pj, **p)
+        hit = ~found & (j < lam) & _close(Hj, Pj, H, P, rtol, atol)
+        period[hit] = j
+        found |= hit
+        small &= found | _close(Hj, Pj, H, P, _SPREAD * rtol, _SPREAD * atol)
+    period[small] = 1
+    return period
+
+
+def settle(model, H0, P0, N, rtol=1e-8, atol=1e-10, max_period=64,
+           extinct=1e-12, diverge=1e100, compact_every=8, **params):
+    """
+    Iterate a discrete map until every trajectory has settled.
+
+    Parameters
+    ----------
+    model : str
+        Model name, as in maps.iterate.
+    H0, P0 : array_like
+        Initial populations, broadcast with the parameters.
+    N : int
+        Maximum number of years.
+    rtol, atol : float
+        Tolerance for two states to count as equal.
+    max_period : int
+        Longest cycle period that is detected.
+    extinct : float
+        A lane is EXTINCT once H or P falls below this value.
+    diverge : float
+        A lane is DIVERGED once H or P exceeds this value or is not finite.
+    compact_every : int
+        Retired lanes are removed from the working arrays every
+        ``compact_every`` years.
+    **params : array_like
+        Model parameters.
+
+    Returns
+    -------
+    SettleResult
+        The state at which each lane settled (or the state after N years),
+        its status code (RUNNING, FIXED_POINT, CYCLE, EXTINCT or DIVERGED),
+        the detected period (0 if none) and the year at which the lane
+        settled, went extinct or diverged.
+    """
+    spec = get_model(model)
+    H, P, p = broadcast_batch(H0, P0, model_params(model, params))
+    batch = H.size
+
+    # Outputs:
+    H_out = H.copy()
+    P_out = P.copy()
+    status = np.full(batch, RUNNING, dtype=np.int8)
+    period = np.zeros(batch, dtype=int)
+    when = np.full(batch, N, dtype=int)
+
+    # Working arrays (Brent's tortoise, step count and power of two):
+    lanes = np.arange(batch)
+    live = np.ones(batch, dtype=bool)
+    tH, tP = H.copy(), P.copy()
+    lam = np.zeros(batch, dtype=int)
+    power = np.ones(batch, dtype=int)
+    cap = 1 << int(np.ceil(np.log2(max(max_period, 1))))
+
+    with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+        for t in range(1, N + 1):
+            H, P = spec.step(H, P, **p)
+            lam += 1
+
+            # Overflowing and collapsing lanes are retired first:
+            bad = live & ~((H <= diverge) & (P <= diverge))
+            low = live & ~bad & ((H < extinct) | (P < extinct))
+            for mask, code in ((bad, DIVERGED), (low, EXTINCT)):
+                if mask.any():
+                    out = lanes[mask]
+                    H_out[out] = H[mask]
+                    P_out[out] = P[mask]
+                    status[out] = code
+                    when[out] = t
+                    live &= ~mask
+
+            # Lanes that returned to their tortoise state have settled:
+            hit = live & (lam <= max_period) & _close(H, P, tH, tP, rtol,
+                                                      atol)
+            if hit.any():
+                idx = np.flatnonzero(hit)
+                per = _min_period(spec, H[idx], P[idx],
+                                  {name: v[idx] for name, v in p.items()},
+                                  lam[idx], rtol, atol)
+                out = lanes[idx]
+                H_out[out] = H[idx]
+                P_out[out] = P[idx]
+                period[out] = per
+                status[out] = np.where(per == 1, FIXED_POINT, CYCLE)
+                when[out] = t
+                live[idx] = False
+
+            # Move the tortoise at power-of-two intervals:
+            move = lam == power
+            tH = np.where(move, H, tH)
+            tP = np.where(move, P, tP)
+            power = np.where(move, np.minimum(2 * power, cap), power)
+            lam[move] = 0
+
+            # Drop retired lanes from the working arrays:
+            if t % compact_every == 0 and not live.all():
+                keep = live
+                lanes, H, P, tH, tP, lam, power = [
+                    a[keep] for a in (lanes, H, P, tH, tP, lam, power)]
+                p = {name: v[keep] for name, v in p.items()}
+                live = live[keep]
+                if lanes.size == 0:
+                    break
+
+    # Lanes still running report their final state:
+    H_out[lanes[live]] = H[live]
+    P_out[lanes[live]] = P[live]
+    return SettleResult(H_out, P_out, status, period, when)
@@ -0,0 +1,132 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module classifies the linear stability of the coexistence fixed
+% point (H*, P*) of the discrete models over whole parameter grids.  The
+% fixed point is known in closed form for every model, the 2x2 Jacobian is
+% evaluated there, and the Jury conditions for a 2x2 matrix,
+%   1 - tr(J) + det(J) > 0,   1 + tr(J) + det(J) > 0,   1 - det(J) > 0,
+% decide stability without computing eigenvalues.
+"""
+
+# Import libraries:
+from collections import namedtuple
+
+import numpy as np
+
+from .maps import get_model, model_params
+
+# Stability classes:
+NO_COEXISTENCE = 0   # no positive coexistence fixed point
+STABLE = 1           # all three Jury conditions hold
+SADDLE = 2           # 1 - tr + det <= 0, a real eigenvalue >= 1
+FLIP = 3             # 1 + tr + det <= 0, a real eigenvalue <= -1
+NEIMARK_SACKER = 4   # det >= 1, complex eigenvalues outside the unit circle
+NEUTRAL = 5          # det = 1 within tolerance, otherwise stable
+
+LABELS = {
+    NO_COEXISTENCE: 'No Coexistence Equilibrium',
+    STABLE: 'Stable Equilibrium',
+    SADDLE: 'Unstable (Saddle)',
+    FLIP: 'Unstable (Flip)',
+    NEIMARK_SACKER: 'Unstable (Oscillatory)',
+    NEUTRAL: 'Neutrally Stable',
+}
+
+StabilityMap = namedtuple('StabilityMap', ['code', 'H', 'P', 'trace', 'det'])
+
+
+# Coexistence fixed points (NaN where none exists):
+def _nicholson_bailey_fp(R, c, k):
+    P = np.log(R) / c
+    return P / (k * (R - 1)), P
+
+
+def _host_refuge_fp(R, c, k, alpha):
+    E = (1 / R - alpha) / (1 - alpha)
+    P = -np.log(E) / c
+    return P / (k * (1 - alpha) * R * (1 - E)), P
+
+
+def _functional_response_fp(R, c, k, T):
+    H = 1 / np.sqrt(c * R * T * k)
+    return H, k * (R - 1) * H
+
+
+def _host_mortality_fp(R, c, k, z, T):
+    P = (np.log(R) - z) / (c * T)
+    E = np.exp(z) / R
+    return np.expm1(z) * P / (z * k * R * (1 - E)), P
+
+
+FIXED_POINTS = {
+    'nicholson_bailey': _nicholson_bailey_fp,
+    'host_refuge': _host_refuge_fp,
+    'functional_response': _functional_response_fp,
+    'host_mortality': _host_mortality_fp,
+}
+
+
+def fixed_point(model, **params):
+    """
+    Coexistence fixed point (H*, P*) of a model; parameters broadcast.
+    Entries are NaN where no positive fixed point exists.
+    """
+    get_model(model)
+    p = model_params(model, params)
+    p = dict(zip(p, np.broadcast_arrays(*[np.asarray(v, dtype=float)
+                                          for v in p.values()])))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        H, P = FIXED_POINTS[model](**p)
+    ok = np.isfinite(H) & np.isfinite(P) & (H > 0) & (P > 0)
+    return np.where(ok, H, np.nan), np.where(ok, P, np.nan)
+
+
+def jury_classify(trace, det, neutral_tol=1e-9):
+    """
+    Classify 2x2 Jacobians from their trace and determinant.
+
+    Cells where trace or det is NaN are NO_COEXISTENCE.  When several
+    Jury conditions fail, the first failing one in the order SADDLE,
+    FLIP, NEIMARK_SACKER is reported.
+    """
+    trace = np.asarray(trace, dtype=float)
+    det = np.asarray(det, dtype=float)
+    code = np.full(np.broadcast(trace, det).shape, NEIMARK_SACKER,
+                   dtype=np.int8)
+    j1 = 1 - trace + det
+    j2 = 1 + trace + det
+    j3 = 1 - det
+    neutral = np.abs(j3) <= neutral_tol
+    code[(j1 > 0) & (j2 > 0) & (j3 > 0)] = STABLE
+    code[(j1 > 0) & (j2 > 0) & neutral] = NEUTRAL
+    code[j2 <= 0] = FLIP
+    code[j1 <= 0] = SADDLE
+    code[np.isnan(trace) | np.isnan(det)] = NO_COEXISTENCE
+    return code
+
+
+def classify(model, neutral_tol=1e-9, **params):
+    """
+    Stability of the coexistence fixed point over a parameter grid.
+
+    Parameters broadcast against each other, so a plane is given as e.g.
+    ``classify('host_refuge', R=R[:, None], alpha=alpha[None, :])``.
+
+    Returns
+    -------
+    StabilityMap
+        Stability class codes (see ``LABELS``), the fixed point and the
+        trace and determinant of the Jacobian there, all with the
+        broadcast shape of the parameters.
+    """
+    spec = get_model(model)
+    p = model_params(model, params)
+    p = dict(zip(p, np.broadcast_arrays(*[np.asarray(v, dtype=float)
+                                          for v in p.values()])))
+    H, P = fixed_point(model, **p)
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        a, b, c, d = spec.jacobian(H, P, **p)
+    trace = a + d
+    det = a * d - b * c
+    return StabilityMap(jury_classify(trace, det, neutral_tol), H, P, trace,
+                        det)
@@ -0,0 +1,222 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module simulates stochastic versions of the discrete models of
+% maps.MODELS for large ensembles of replicates.  Populations are
+% integers.  Each year the H_t hosts lay Poisson(R H_t) eggs.  The
+% deterministic step of the model gives the expected survivors H' and
+% parasitoids P', so each egg escapes independently with probability
+%   f = H' / (R H_t)
+% and each of the R H_t (1 - f) parasitized hosts gives on average
+% P' / (R H_t (1 - f)) parasitoids, drawn as one Poisson number.  The
+% expected update is therefore the deterministic map.  Environmental
+% noise makes R a lognormal random variable with mean R, drawn per
+% replicate and year.  For the models whose escape term is exp(-c P)
+% (nicholson_bailey and host_refuge) encounters may instead follow a
+% negative binomial, exp(-c P) -> (1 + c P/kappa)^(-kappa); the other
+% models have no such term, so the option is refused for them.
+%
+% Replicates are simulated in blocks of a fixed size, and every block has
+% its own random stream spawned from one SeedSequence.  Blocks may run in
+% separate processes, but their statistics are merged in block order, so
+% the results are bit-for-bit the same for any number of workers.  Only
+% extinction-time histograms and per-year abundance moments are kept.
+"""
+
+# Import libraries:
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .maps import get_model, model_params
+
+# Encounter distributions:
+ESCAPE = ('poisson', 'negative_binomial')
+
+# Models whose escape term is exp(-c P), the only ones for which the
+# negative binomial form is defined:
+_EXP_ESCAPE = ('nicholson_bailey', 'host_refuge')
+
+EnsembleStats = namedtuple('EnsembleStats', [
+    'replicates', 'host_extinction', 'parasitoid_extinction', 'divergence',
+    'count', 'H_mean', 'H_var', 'P_mean', 'P_var'])
+
+
+def _run_block(task):
+    # Simulate one block of replicates and return its statistics:
+    seed, size, model, H0, P0, N, params, escape, kappa, sigma, ceiling = \
+        task
+    spec = get_model(model)
+    rng = np.random.Generator(np.random.PCG64(seed))
+    H = np.full(size, H0, dtype=np.int64)
+    P = np.full(size, P0, dtype=np.int64)
+    R = params['R']
+    c = params['c']
+
+    host_ext = np.zeros(N + 1, dtype=np.int64)
+    para_ext = np.zeros(N + 1, dtype=np.int64)
+    diverged = np.zeros(N + 1, dtype=np.int64)
+    count = np.zeros(N + 1, dtype=np.int64)
+    moments = np.zeros((4, N + 1))   # means and sums of squared deviations
+    host_alive = H > 0
+    para_alive = P > 0
+
+    def record(t):
+        count[t] = H.size
+        if H.size:
+            for row, X in ((0, H), (2, P)):
+                mean = X.mean()
+                moments[row, t] = mean
+                moments[row + 1, t] = np.sum((X - mean) ** 2)
+
+    record(0)
+    for t in range(1, N + 1):
+        R_t = R
+        if sigma > 0:
+            R_t = R * np.exp(sigma * rng.standard_normal(H.size)
+                             - 0.5 * sigma**2)
+        lam = R_t * H
+        if escape == 'poisson':
+            P_eff = P.astype(float)
+        else:
+            # exp(-c P_eff) equals the negative binomial escape term:
+            P_eff = kappa / c * np.log1p(c * P / kappa)
+        # host_mortality is 0/0 at P = 0; a tiny P gives its limit there:
+        P_eff = np.maximum(P_eff, 1e-100)
+        with np.errstate(over='ignore', invalid='ignore', divide='ignore'):
+            H_exp, P_exp = spec.step(H.astype(float), P_eff,
+                                     **dict(params, R=R_t))
+            alive = H > 0
+            f = np.clip(np.where(alive, H_exp / lam, 1.0), 0.0, 1.0)
+            caught = lam * (1 - f)
+            offspring = np.where(alive & (caught > 0), P_exp / caught, 0.0)
+        eggs = rng.poisson(lam)
+        H = rng.binomial(eggs, f)
+        P = rng.poisson(offspring * (eggs - H))
+
+        # First extinction times:
+        dead = host_alive & (H == 0)
+        host_ext[t] = dead.sum()
+        host_alive &= ~dead
+        dead = para_alive & (P == 0)
+        para_ext[t] = dead.sum()
+        para_alive &= ~dead
+
+        # Replicates that pass the ceiling leave the ensemble:
+        big = (H > ceiling) | (P > ceiling)
+        if big.any():
+            diverged[t] = big.sum()
+            keep = ~big
+            H, P = H[keep], P[keep]
+            host_alive, para_alive = host_alive[keep], para_alive[keep]
+        record(t)
+    return host_ext, para_ext, diverged, count, moments
+
+
+def _merge(total, block):
+    # Combine per-year counts and moments (Chan et al. pairwise update):
+    host_ext, para_ext, diverged, count, moments = block
+    if total is None:
+        return [a.copy() for a in block]
+    n_a, n_b = total[3], count
+    n = n_a + n_b
+    with np.errstate(invalid='ignore', divide='ignore'):
+        for row in (0, 2):
+            delta = moments[row] - total[4][row]
+            w = np.where(n > 0, n_b / np.maximum(n, 1), 0.0)
+            total[4][row + 1] += (moments[row + 1]
+                                  + delta**2 * n_a * w)
+            total[4][row] += delta * w
+    total[0] += host_ext
+    total[1] += para_ext
+    total[2] += diverged
+    total[3] = n
+    return total
+
+
+def ensemble(replicates, N, model='nicholson_bailey', H0=5, P0=8,
+             escape='poisson', kappa=1.0, sigma=0.0, ceiling=1e12, seed=0,
+             block_size=65536, workers=1, **params):
+    """
+    Monte Carlo ensemble of the stochastic host-parasitoid model.
+
+    Parameters
+    ----------
+    replicates : int
+        Number of independent replicates.
+    N : int
+        Number of years.
+    model : str
+        Name of a model in maps.MODELS, whose step gives the expected
+        update.
+    H0, P0 : int
+        Initial populations of every replicate.
+    escape : str
+        ``poisson`` or ``negative_binomial`` encounters (the latter for
+        nicholson_bailey and host_refuge only).
+    kappa : float
+        Aggregation parameter of the negative binomial.
+    sigma : float
+        Standard deviation of log R (environmental noise).
+    ceiling : float
+        Replicates with a population above this value are counted as
+        diverged and leave the ensemble.
+    seed : int or SeedSequence
+        Root seed; block b always uses the child stream with spawn key
+        ``seed.spawn_key + (b,)``.  The seed itself is not modified, so
+        the same SeedSequence gives the same result on every call.
+    block_size : int
+        Replicates per block (part of the random stream layout, so it
+        must be kept fixed to reproduce a result).
+    workers : int
+        Number of processes; 1 runs in the calling process.
+    **params : float
+        Model parameters, with the defaults of maps.MODELS.
+
+    Returns
+    -------
+    EnsembleStats
+        Arrays over the years t = 0..N: the number of replicates in which
+        the hosts or the parasitoids first died out in year t, the number
+        that diverged in year t, the number still in the ensemble, and the
+        mean and variance of H_t and P_t over those replicates.
+    """
+    if escape not in ESCAPE:
+        raise ValueError('unknown escape %r; expected one of %s'
+                         % (escape, ', '.join(ESCAPE)))
+    if escape != 'poisson' and model not in _EXP_ESCAPE:
+        raise ValueError('escape %r needs a model with an exp(-c P) escape '
+                         'term; expected one of %s'
+                         % (escape, ', '.join(_EXP_ESCAPE)))
+    params = {name: float(v)
+              for name, v in model_params(model, params).items()}
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    n_blocks = -(-replicates // block_size)
+    # Children of the root derived without spawn(), which would advance
+    # the caller's SeedSequence:
+    streams = [np.random.SeedSequence(seed.entropy,
+                                      spawn_key=seed.spawn_key + (b,),
+                                      pool_size=seed.pool_size)
+               for b in range(n_blocks)]
+    tasks = [(streams[b], min(block_size, replicates - b * block_size),
+              model, H0, P0, N, params, escape, kappa, sigma, ceiling)
+             for b in range(n_blocks)]
+
+    total = None
+    if workers == 1:
+        for task in tasks:
+            total = _merge(total, _run_block(task))
+    else:
+        with ProcessPoolExecutor(workers) as pool:
+            for block in pool.map(_run_block, tasks):
+                total = _merge(total, block)
+
+    host_ext, para_ext, diverged, count, moments = total
+    with np.errstate(invalid='ignore', divide='ignore'):
+        H_var = np.where(count > 1, moments[1] / (count - 1), np.nan)
+        P_var = np.where(count > 1, moments[3] / (count - 1), np.nan)
+    H_mean = np.where(count > 0, moments[0], np.nan)
+    P_mean = np.where(count > 0, moments[2], np.nan)
+    return EnsembleStats(replicates, host_ext, para_ext, diverged, count,
+                         H_mean, H_var, P_mean, P_var)
@@ -0,0 +1,148 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% This module runs parameter sweeps of the egg maturation delay model of
+% Section 4 (see Section_4/Egg_Delay_Trajectory.py) over a process pool.
+% The grid of (H0, P0, beta, c, cr, R, k) values is cut into shards of
+% consecutive grid points.  Every worker solves its shard with
+% egg_delay.trajectory_batch and writes the trajectories straight into
+% H.npy and P.npy, which all processes open as memory maps, so no results
+% are sent back through the pool.  Once a shard is flushed to disk an
+% empty marker file records it as done; a sweep that is interrupted and
+% started again with the same arguments only computes the missing shards.
+% With a ResultCache, shards already solved by an earlier sweep (in any
+% directory) are read from the cache instead of being solved again.
+"""
+
+# Import libraries:
+import json
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from .egg_delay import trajectory_batch
+
+# Swept quantities, in the order of the output axes:
+AXES = ('H0', 'P0', 'beta', 'c', 'cr', 'R', 'k')
+
+SweepResult = namedtuple('SweepResult', ['H', 'P', 'axes', 'computed'])
+
+
+def _marker(path, shard):
+    return os.path.join(path, 'done', '%d' % shard)
+
+
+def _run_shard(task):
+    # Solve the grid points [lo, hi) and write them into the memory maps:
+    path, shard, lo, hi, config, cache = task
+    axes = {name: np.asarray(v) for name, v in config['axes'].items()}
+    shape = tuple(v.size for v in axes.values())
+    index = np.unravel_index(np.arange(lo, hi), shape)
+    values = dict(config['fixed'])
+    for name, i in zip(axes, index):
+        values[name] = axes[name][i]
+    res = trajectory_batch(N=config['N'], T=config['T'],
+                           method=config['method'], rtol=config['rtol'],
+                           atol=config['atol'], cache=cache, **values)
+    for name, Y in (('H', res.H), ('P', res.P)):
+        out = np.load(os.path.join(path, name + '.npy'), mmap_mode='r+')
+        out.reshape(-1, config['N'] + 1)[lo:hi] = Y
+        out.flush()
+        del out
+    open(_marker(path, shard), 'w').close()
+    return shard
+
+
+def sweep(path, N, shard_size=256, workers=1, T=1.0, method='Rosenbrock',
+          rtol=1e-6, atol=1e-9, H0=5.0, P0=8.0, beta=0.5, c=0.1, cr=1.0,
+          R=2.0, k=1.0, cache=None):
+    """
+    Egg delay trajectories over a parameter grid, with checkpointing.
+
+    Parameters
+    ----------
+    path : str
+        Output directory.  If it holds an unfinished sweep with the same
+        arguments, only the shards that are not done yet are computed.
+    N : int
+        Number of years.
+    shard_size : int
+        Grid points per shard (one trajectory_batch call).
+    workers : int
+        Number of processes; 1 runs the shards in this process.
+    T, method, rtol, atol
+        Season length and solver options of trajectory_batch.
+    H0, P0, beta, c, cr, R, k : float or 1-D array_like
+        Every argument with more than one value becomes an axis of the
+        grid, in this order.
+    cache : ResultCache, optional
+        Cache for the trajectory_batch call of every shard.  It is not
+        part of the sweep arguments, so it may differ when resuming.
+
+    Returns
+    -------
+    SweepResult
+        ``H`` and ``P``, read-only memory maps of shape (axis sizes...,
+        N + 1); ``axes``, the values along each swept axis; and
+        ``computed``, the number of shards run by this call.
+    """
+    given = {'H0': H0, 'P0': P0, 'beta': beta, 'c': c, 'cr': cr, 'R': R,
+             'k': k}
+    axes = {}
+    fixed = {}
+    for name in AXES:
+        v = np.ravel(np.asarray(given[name], dtype=float))
+        if v.size > 1:
+            axes[name] = v.tolist()
+        else:
+            fixed[name] = float(v[0])
+    config = {'N': N, 'T': T, 'method': method, 'rtol': rtol, 'atol': atol,
+              'shard_size': shard_size, 'axes': axes, 'fixed': fixed}
+    shape = tuple(len(v) for v in axes.values()) + (N + 1,)
+    points = int(np.prod(shape[:-1]))
+
+    # Start a new sweep unless the directory holds this very sweep:
+    config_path = os.path.join(path, 'sweep.json')
+    try:
+        with open(config_path) as f:
+            resume = json.load(f) == json.loads(json.dumps(config))
+    except (FileNotFoundError, ValueError):
+        resume = False
+    if not resume:
+        if os.path.exists(config_path):
+            raise ValueError('%s holds a sweep with other arguments' % path)
+        os.makedirs(os.path.join(path, 'done'), exist_ok=True)
+        for name in ('H', 'P'):
+            out = np.lib.format.open_memmap(
+                os.path.join(path, name + '.npy'), mode='w+', shape=shape)
+            out[...] = np.nan
+            out.flush()
+            del out
+        for marker in os.listdir(os.path.join(path, 'done')):
+            os.remove(os.path.join(path, 'done', marker))
+        with open(config_path + '.tmp', 'w') as f:
+            json.dump(config, f, indent=1)
+        os.replace(config_path + '.tmp', config_path)
+
+    tasks = [(path, shard, lo, min(lo + shard_size, points), config, cache)
+             for shard, lo in enumerate(range(0, points, shard_size))
+             if not os.path.exists(_marker(path, shard))]
+    if workers == 1:
+        for task in tasks:
+            _run_shard(task)
+    elif tasks:
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(_run_shard, task) for task in tasks]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+    H = np.load(os.path.join(path, 'H.npy'), mmap_mode='r')
+    P = np.load(os.path.join(path, 'P.npy'), mmap_mode='r')
+    return SweepResult(H, P, {name: np.array(v) for name, v in axes.items()},
+                       len(tasks))
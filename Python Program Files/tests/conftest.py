@@ -0,0 +1,31 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Shared fixtures of the tests: run_script(path) runs a Section_* script
+% headless and returns its global variables, so that the package can be
+% checked against the reference implementation of each figure.
+"""
+
+# Import libraries:
+import os
+import runpy
+
+import matplotlib
+import pytest
+
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt  # noqa: E402
+
+# Folder holding the Section_* directories:
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def run_script(monkeypatch):
+    monkeypatch.setattr(plt, 'show', lambda *args, **kwargs: None)
+
+    def run(path):
+        try:
+            return runpy.run_path(os.path.join(ROOT, path))
+        finally:
+            plt.close('all')
+    return run
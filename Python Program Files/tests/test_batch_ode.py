@@ -0,0 +1,54 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Checks the batched integrator against solve_ivp, for the egg delay
+% season with both methods and for a stiff time-dependent system.  Run
+% with python -m pytest from Python Program Files.
+"""
+
+# Import libraries:
+import numpy as np
+import pytest
+from scipy.integrate import solve_ivp
+
+from host_parasitoid.batch_ode import solve_batch
+from host_parasitoid.egg_delay import (egg_delay_jac_batch, egg_delay_rhs,
+                                       egg_delay_rhs_batch)
+
+
+@pytest.mark.parametrize('method', ['RK45', 'Rosenbrock'])
+def test_egg_delay_season_matches_solve_ivp(method):
+    rng = np.random.default_rng(1)
+    H = rng.uniform(1, 100, 8)
+    P = rng.uniform(0.5, 20, 8)
+    c = rng.uniform(0.01, 0.3, 8)
+    cr = rng.uniform(0.1, 5, 8)
+    Y_0 = np.stack([2 * H, np.zeros_like(H), 0.5 * P, 0.5 * P], axis=1)
+    res = solve_batch(egg_delay_rhs_batch, (0.0, 1.0), Y_0, args=(c, cr),
+                      method=method, jac=egg_delay_jac_batch, rtol=1e-9,
+                      atol=1e-12, autonomous=True)
+    assert res.success.all()
+    for i in range(H.size):
+        ref = solve_ivp(egg_delay_rhs, (0.0, 1.0), Y_0[i],
+                        args=(c[i], cr[i]), method='DOP853', rtol=1e-13,
+                        atol=1e-14)
+        np.testing.assert_allclose(res.y[i], ref.y[:, -1], rtol=1e-6,
+                                   atol=1e-8)
+
+
+@pytest.mark.parametrize('method', ['RK45', 'Rosenbrock'])
+def test_time_dependent_system(method):
+    # y' = -a (y - cos t), y(0) = 1, stiff for large a; exactly
+    # y = (exp(-a t) + a (a cos t + sin t)) / (a^2 + 1):
+    def fun(t, y, a):
+        return -a[:, None] * (y - np.cos(t)[:, None])
+
+    def jac(t, y, a):
+        return -a[:, None, None] * np.ones((y.shape[0], 1, 1))
+
+    a = np.array([1.0, 50.0])
+    res = solve_batch(fun, (0.0, 3.0), np.ones((2, 1)), args=(a,),
+                      method=method, jac=jac, rtol=1e-9, atol=1e-12)
+    assert res.success.all()
+    exact = (np.exp(-3 * a) + a * (a * np.cos(3.0) + np.sin(3.0))) \
+        / (a**2 + 1)
+    np.testing.assert_allclose(res.y[:, 0], exact, rtol=1e-7)
@@ -0,0 +1,24 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Checks that chunked iteration, including a resumed run, reproduces
+% maps.iterate.  Run with python -m pytest from Python Program Files.
+"""
+
+# Import libraries:
+import numpy as np
+
+from host_parasitoid.maps import iterate, iterate_chunks
+
+
+def test_resume_with_grid_parameters():
+    R, alpha = np.meshgrid(np.linspace(1.5, 4, 7), np.linspace(0, 0.9, 5))
+    full = iterate('host_refuge', 5, 8, 60, R=R, alpha=alpha)
+    chunks = list(iterate_chunks('host_refuge', 5, 8, 60, chunk_size=8,
+                                 stride=2, R=R, alpha=alpha))
+    rest = list(iterate_chunks('host_refuge', None, None, 60, chunk_size=8,
+                               stride=2, state=chunks[1].state))
+    assert len(rest) == len(chunks) - 2
+    X = np.concatenate([c.X for c in chunks[:2] + rest], axis=1)
+    t = np.concatenate([c.t for c in chunks[:2] + rest])
+    np.testing.assert_array_equal(t, np.arange(0, 61, 2))
+    np.testing.assert_array_equal(X, full[:, ::2])
@@ -0,0 +1,80 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Checks the coupled map lattice: its local update against maps.step and
+% its FFT dispersal against a direct sum over the kernel, for periodic and
+% absorbing boundaries.  Run with python -m pytest from Python Program
+% Files.
+"""
+
+# Import libraries:
+import numpy as np
+import pytest
+
+from host_parasitoid.lattice import Lattice
+from host_parasitoid.maps import step
+
+PARAMS = {'nicholson_bailey': {}, 'host_refuge': {'alpha': 0.3},
+          'host_mortality': {'z': 0.5}}
+
+
+def _disperse(X, K, mu, boundary):
+    # Direct dispersal: a source at (i, j) sends mu*K[a, b] of its
+    # population to (i + a - r0, j + b - r1):
+    r0, r1 = K.shape[0] // 2, K.shape[1] // 2
+    n0, n1 = X.shape
+    out = (1 - mu) * X
+    if boundary == 'periodic':
+        for a in range(K.shape[0]):
+            for b in range(K.shape[1]):
+                out += mu * K[a, b] * np.roll(X, (a - r0, b - r1), (0, 1))
+    else:
+        pad = np.zeros((n0 + 2 * r0, n1 + 2 * r1))
+        for a in range(K.shape[0]):
+            for b in range(K.shape[1]):
+                pad[a:a + n0, b:b + n1] += mu * K[a, b] * X
+        out += pad[r0:r0 + n0, r1:r1 + n1]
+    return out
+
+
+def _random_state(lat, seed):
+    rng = np.random.default_rng(seed)
+    lat.H[...] = rng.uniform(1, 20, lat.shape)
+    lat.P[...] = rng.uniform(1, 20, lat.shape)
+    return lat.H.copy(), lat.P.copy()
+
+
+@pytest.mark.parametrize('model', sorted(PARAMS))
+def test_local_update_matches_maps(model):
+    lat = Lattice(model, (6, 7), mu_H=0.0, mu_P=0.0, **PARAMS[model])
+    H, P = _random_state(lat, 0)
+    lat.step()
+    H1, P1 = step(model, H, P, **PARAMS[model])
+    np.testing.assert_allclose(lat.H, H1, rtol=1e-12)
+    np.testing.assert_allclose(lat.P, P1, rtol=1e-12)
+
+
+@pytest.mark.parametrize('boundary', ['periodic', 'absorbing'])
+def test_dispersal_matches_direct_sum(boundary):
+    # An asymmetric kernel also checks the direction of dispersal:
+    K = np.random.default_rng(1).uniform(0, 1, (3, 5))
+    K[1, 2] = 0
+    lat = Lattice('host_refuge', (9, 11), kernel=K, mu_H=0.4, mu_P=0.7,
+                  boundary=boundary, alpha=0.3)
+    H, P = _random_state(lat, 2)
+    lat.step()
+    H1, P1 = step('host_refuge', H, P, alpha=0.3)
+    K = K / K.sum()
+    np.testing.assert_allclose(lat.H, _disperse(H1, K, 0.4, boundary),
+                               rtol=1e-10, atol=1e-12)
+    np.testing.assert_allclose(lat.P, _disperse(P1, K, 0.7, boundary),
+                               rtol=1e-10, atol=1e-12)
+
+
+def test_periodic_dispersal_conserves_totals():
+    # Without parasitoids and with R = 1 the local update is the identity:
+    lat = Lattice('nicholson_bailey', (16, 16), kernel='gaussian',
+                  sigma=2.0, mu_H=1.0, R=1.0)
+    lat.H[3, 4] = 10.0
+    totals = lat.run(5)
+    np.testing.assert_allclose(totals[:, 0], 10.0, rtol=1e-12)
+    assert (lat.H > 0).sum() > 1
@@ -0,0 +1,70 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Checks the batched maps against the trajectory scripts of Sections 2
+% and 4, and their Jacobians against finite differences.  Run with
+% python -m pytest from Python Program Files.
+"""
+
+# Import libraries:
+import numpy as np
+import pytest
+
+from host_parasitoid.maps import MODELS, iterate, jacobian, param_jacobian
+
+# Script, model and the script variables holding its parameters (the
+# scripts with a parameter loop are compared on their last run):
+SCRIPTS = [
+    ('Section_2/Nicholson_Bailey_Trajectory.py', 'nicholson_bailey', ()),
+    ('Section_2/Host_Refuge_Trajectory.py', 'host_refuge', ('alpha',)),
+    ('Section_4/Functional_Response_Trajectory.py', 'functional_response',
+     ('T',)),
+    ('Section_4/Host_Mortality_Trajectories.py', 'host_mortality',
+     ('z', 'T')),
+]
+
+# A state and parameters away from any singularity:
+STATE = (7.0, 3.0)
+PARAMS = {'R': 2.5, 'c': 0.15, 'k': 0.9, 'alpha': 0.3, 'z': 0.6, 'T': 1.2}
+
+
+def _params(model):
+    return {name: PARAMS[name] for name in MODELS[model].params}
+
+
+@pytest.mark.parametrize('script, model, extra', SCRIPTS)
+def test_iterate_matches_script(run_script, script, model, extra):
+    ns = run_script(script)
+    params = {name: ns[name] for name in ('R', 'c', 'k') + extra}
+    X = iterate(model, ns['H0'], ns['P0'], ns['N'], **params)
+    np.testing.assert_allclose(X[0, :, 0], ns['H'], rtol=1e-12)
+    np.testing.assert_allclose(X[0, :, 1], ns['P'], rtol=1e-12)
+
+
+@pytest.mark.parametrize('model', sorted(MODELS))
+def test_jacobian_matches_finite_differences(model):
+    H, P = STATE
+    p = _params(model)
+    step = MODELS[model].step
+    J = np.array(jacobian(model, H, P, **p), dtype=float).reshape(2, 2)
+    eps = 1e-6
+    for col, (dH, dP) in enumerate(((eps * H, 0), (0, eps * P))):
+        plus = np.array(step(H + dH, P + dP, **p))
+        minus = np.array(step(H - dH, P - dP, **p))
+        np.testing.assert_allclose(J[:, col], (plus - minus)
+                                   / (2 * (dH + dP)), rtol=1e-6)
+
+
+@pytest.mark.parametrize('model', sorted(MODELS))
+def test_param_jacobian_matches_finite_differences(model):
+    H, P = STATE
+    p = _params(model)
+    step = MODELS[model].step
+    dp = param_jacobian(model, H, P, **p)
+    assert set(dp) == set(p)
+    for name, value in p.items():
+        h = 1e-6 * value
+        plus = np.array(step(H, P, **dict(p, **{name: value + h})))
+        minus = np.array(step(H, P, **dict(p, **{name: value - h})))
+        np.testing.assert_allclose(np.array(dp[name], dtype=float),
+                                   (plus - minus) / (2 * h), rtol=1e-6,
+                                   atol=1e-9)
@@ -0,0 +1,75 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Checks the batched stability boundary solver against the fsolve loops of
+% the stability region scripts, and the Jury classification against the
+% eigenvalues of the Jacobian at the fixed point.  Run with python -m
+% pytest from Python Program Files.
+"""
+
+# Import libraries:
+import numpy as np
+import pytest
+
+from host_parasitoid.boundaries import solve_boundary
+from host_parasitoid.maps import jacobian, step
+from host_parasitoid.stability import (FLIP, NEIMARK_SACKER, NEUTRAL,
+                                       SADDLE, STABLE, classify)
+
+SCRIPTS = [
+    ('Section_2/Host_Refuge_Stability_Region.py', 'alpha_star', 'a_star'),
+    ('Section_4/Host_Mortality_Stability_Region.py', 'z_star', 'z_star'),
+]
+
+
+@pytest.mark.parametrize('script, boundary, name', SCRIPTS)
+def test_boundary_matches_script(run_script, script, boundary, name):
+    ns = run_script(script)
+    res = solve_boundary(boundary, ns['R_vec'])
+    assert res.converged.all()
+    assert np.abs(res.residual).max() < 1e-10
+    np.testing.assert_allclose(res.x, ns[name], rtol=0, atol=1e-9)
+    cold = solve_boundary(boundary, ns['R_vec'], warm_start=False)
+    np.testing.assert_allclose(cold.x, res.x, rtol=0, atol=1e-12)
+
+
+def test_boundary_below_one_is_nan():
+    res = solve_boundary('z_star', [0.5, 1.0, 2.0])
+    assert np.isnan(res.x[:2]).all() and np.isfinite(res.x[2])
+
+
+@pytest.mark.parametrize('model, name, values', [
+    ('host_refuge', 'alpha', np.linspace(0.01, 0.95, 40)),
+    ('host_mortality', 'z', np.linspace(0.01, 1.5, 40)),
+    ('nicholson_bailey', 'k', np.linspace(0.5, 2, 4)),
+])
+def test_classify_matches_eigenvalues(model, name, values):
+    R = np.linspace(1.05, 6, 45)[:, None]
+    res = classify(model, R=R, **{name: values[None, :]})
+    params = {'R': R, name: values[None, :]}
+
+    # The fixed point is one:
+    ok = np.isfinite(res.H)
+    H1, P1 = step(model, res.H, res.P, **params)
+    np.testing.assert_allclose(H1[ok], res.H[ok], rtol=1e-9)
+    np.testing.assert_allclose(P1[ok], res.P[ok], rtol=1e-9)
+
+    # Stable exactly when both eigenvalues lie inside the unit circle,
+    # away from the boundary itself:
+    a, b, c, d = np.broadcast_arrays(*jacobian(model, res.H, res.P,
+                                               **params))
+    J = np.stack([np.stack([a, b], -1), np.stack([c, d], -1)], -2)
+    radius = np.full(res.H.shape, np.nan)
+    radius[ok] = np.abs(np.linalg.eigvals(J[ok])).max(axis=-1)
+    clear = ok & (np.abs(radius - 1) > 1e-6)
+    assert clear.sum() > 0
+    stable = np.isin(res.code, (STABLE, NEUTRAL))
+    unstable = np.isin(res.code, (SADDLE, FLIP, NEIMARK_SACKER))
+    np.testing.assert_array_equal(stable[clear], radius[clear] < 1)
+    np.testing.assert_array_equal(unstable[clear], radius[clear] > 1)
+
+
+def test_functional_response_is_neutral():
+    # With m = 1 the Jacobian at the fixed point has determinant one:
+    res = classify('functional_response', R=np.linspace(1.05, 6, 45),
+                   T=np.linspace(0.5, 2, 4)[:, None])
+    assert (res.code == NEUTRAL).all()
@@ -0,0 +1,50 @@
+"""
+%% The Mathematics of Host-Parasitoid Population Dynamics:
+% Checks that stochastic ensembles are reproducible for any number of
+% workers and that their one-year means follow the deterministic maps.
+% Run with python -m pytest from Python Program Files.
+"""
+
+# Import libraries:
+import numpy as np
+import pytest
+
+from host_parasitoid.maps import step
+from host_parasitoid.stochastic import ensemble
+
+
+def _assert_same(a, b):
+    for x, y in zip(a, b):
+        np.testing.assert_array_equal(x, y)
+
+
+def test_independent_of_worker_count():
+    kwargs = dict(model='host_refuge', alpha=0.3, sigma=0.2, seed=7,
+                  block_size=700)
+    serial = ensemble(3000, 40, workers=1, **kwargs)
+    parallel = ensemble(3000, 40, workers=3, **kwargs)
+    _assert_same(serial, parallel)
+    assert serial.count[0] == 3000
+
+
+def test_seed_sequence_is_not_consumed():
+    seed = np.random.SeedSequence(11)
+    first = ensemble(2000, 20, seed=seed, block_size=500)
+    second = ensemble(2000, 20, seed=seed, block_size=500)
+    _assert_same(first, second)
+    assert seed.n_children_spawned == 0
+
+
+@pytest.mark.parametrize('model, params', [
+    ('nicholson_bailey', {}),
+    ('host_refuge', {'alpha': 0.3}),
+    ('functional_response', {}),
+    ('host_mortality', {'z': 0.5}),
+])
+def test_one_year_mean_matches_map(model, params):
+    res = ensemble(100000, 1, model=model, H0=20, P0=8, seed=3, **params)
+    H1, P1 = step(model, 20.0, 8.0, **params)
+    # Five standard errors of the sample means:
+    n = res.count[1]
+    assert abs(res.H_mean[1] - H1) < 5 * np.sqrt(res.H_var[1] / n)
+    assert abs(res.P_mean[1] - P1) < 5 * np.sqrt(res.P_var[1] / n)